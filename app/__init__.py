@@ -31,7 +31,32 @@ def create_app() -> Flask:
     
     # 初始化数据库
     from .models import db
+    from .utils.sqlite import apply_sqlite_pragmas
+    from .utils.query_profiler import init_query_profiler
+    from .services.search import init_search
+    from .services.tags import init_tag_counters
+    from .services.changes import init_change_tracking
+    from .services.duplicates import init_duplicate_index
+    from .services.review_log import init_review_log
     db.init_app(app)
+    init_search()
+    init_tag_counters()
+    init_change_tracking()
+    init_duplicate_index()
+    init_review_log()
+    with app.app_context():
+        apply_sqlite_pragmas(db.engine, app.config.get("SQLITE_PRAGMAS"))
+        init_query_profiler(app, db.engine)
+    # 软删除数据定时清理（PURGE_INTERVAL_HOURS > 0 时启用）
+    from .services.purge import init_purge_scheduler
+    init_purge_scheduler(app)
+
+    # 注册数据库迁移命令：flask --app app db upgrade
+    from .migrations.cli import db_cli
+    app.cli.add_command(db_cli)
+    # 错题批量导入：flask --app app questions import FILE --user NAME
+    from .cli import questions_cli
+    app.cli.add_command(questions_cli)
     
     # 确保基础上传目录存在
     upload_base_dir = Config.UPLOAD_BASE_DIR
@@ -55,6 +80,7 @@ def create_app() -> Flask:
     from .routes.exams import exams_bp
     from .routes.profile import profile_bp
     from .routes.ai import ai_bp
+    from .routes.tags import tags_bp
     app.register_blueprint(questions_bp)
     # app.register_blueprint(subjects_bp)  # 已禁用科目管理
     app.register_blueprint(reviews_bp)
@@ -62,6 +88,7 @@ def create_app() -> Flask:
     app.register_blueprint(exams_bp)
     app.register_blueprint(profile_bp, url_prefix="/api")
     app.register_blueprint(ai_bp)
+    app.register_blueprint(tags_bp)
     
     # 注册页面路由蓝图
     from .routes.main import main_routes
@@ -0,0 +1,85 @@
+"""错题数据命令行：flask --app app questions import / export / purge / duplicates ..."""
+import sys
+
+import click
+from flask.cli import AppGroup
+
+from .models import db, User
+from .services import duplicates, purge, question_io
+
+questions_cli = AppGroup("questions", help="错题数据批量导入导出、清理与查重")
+
+
+def _get_user(username: str) -> User:
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        raise click.ClickException(f"用户不存在：{username}")
+    return user
+
+
+@questions_cli.command("import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--user", "username", required=True, help="导入到该用户名下")
+@click.option("--format", "fmt", type=click.Choice(question_io.FORMATS), default=None, help="默认按扩展名判断")
+@click.option("--batch-size", type=int, default=None, help="每个事务写入的记录数")
+def import_command(path, username, fmt, batch_size):
+    """从 NDJSON / CSV 文件导入错题。"""
+    user = _get_user(username)
+    fmt = question_io.detect_format(fmt, path, None)
+    if fmt is None:
+        raise click.ClickException("无法识别文件格式，请用 --format 指定 ndjson 或 csv")
+    with open(path, "rb") as stream:
+        result = question_io.import_questions(user.id, stream, fmt, batch_size=batch_size)
+    for error in result.errors:
+        click.echo(f"line {error['line']}: {error['message']}", err=True)
+    if result.to_dict()["errors_truncated"]:
+        click.echo(f"... 另有 {result.failed - len(result.errors)} 条错误未显示", err=True)
+    click.echo(f"total {result.total}  imported {result.imported}  failed {result.failed}")
+
+
+@questions_cli.command("export")
+@click.argument("path", type=click.Path(dir_okay=False, writable=True, allow_dash=True), default="-")
+@click.option("--user", "username", required=True, help="导出该用户的错题")
+@click.option("--format", "fmt", type=click.Choice(question_io.EXPORT_FORMATS), default="ndjson")
+@click.option("--batch-size", type=int, default=None, help="每批读取的错题数")
+def export_command(path, username, fmt, batch_size):
+    """导出错题到文件，PATH 省略或为 - 时写到标准输出。"""
+    user = _get_user(username)
+    chunks = question_io.export_questions(user.id, fmt, batch_size=batch_size)
+    if path == "-":
+        for chunk in chunks:
+            sys.stdout.buffer.write(chunk)
+        sys.stdout.buffer.flush()
+        return
+    with open(path, "wb") as output:
+        for chunk in chunks:
+            output.write(chunk)
+    click.echo(f"exported to {path}", err=True)
+
+
+@questions_cli.command("purge")
+@click.option("--days", type=int, default=None, help="保留天数，默认 Config.PURGE_RETENTION_DAYS")
+@click.option("--batch-size", type=int, default=None, help="每个事务删除的错题数")
+@click.option("--vacuum/--no-vacuum", default=False, help="清理后执行增量 VACUUM")
+@click.option("--dry-run", is_flag=True, help="只统计将被清理的数据，不做修改")
+@click.option("--pause", type=float, default=0.0, help="批次之间暂停的秒数")
+def purge_command(days, batch_size, vacuum, dry_run, pause):
+    """硬删除超过保留天数的已删除错题、科目及其引用的上传文件。"""
+    result = purge.purge_deleted(
+        retention_days=days, batch_size=batch_size, vacuum=vacuum, dry_run=dry_run, pause=pause
+    )
+    if vacuum and not purge.incremental_vacuum_enabled(db.engine):
+        click.echo("数据库未启用 auto_vacuum=INCREMENTAL，请先执行 flask --app app db vacuum", err=True)
+    click.echo(" ".join(f"{key} {value}" for key, value in result.to_dict().items()))
+
+
+@questions_cli.command("duplicates")
+@click.option("--user", "username", required=True, help="检查该用户的错题")
+@click.option("--min-similarity", type=click.FloatRange(0, 1), default=None, help="相似度阈值，默认 Config.DUPLICATE_MIN_SIMILARITY")
+def duplicates_command(username, min_similarity):
+    """找出近似重复的错题簇，每行输出一簇的错题 id。"""
+    user = _get_user(username)
+    clusters = duplicates.find_clusters(user.id, min_similarity)
+    for cluster in clusters:
+        click.echo(" ".join(str(qid) for qid in cluster))
+    click.echo(f"{len(clusters)} clusters, {sum(len(c) for c in clusters)} questions", err=True)
@@ -15,6 +15,57 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = False
 
+    # 连接池配置：pre_ping 丢弃失效连接，busy 时最多等待 connect_args.timeout 秒
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_pre_ping": True,
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", "20")),
+        "pool_timeout": 30,
+        "pool_recycle": 3600,
+        "connect_args": {"timeout": 15},
+    }
+
+    # 错题关键词搜索使用 SQLite FTS5 全文索引（需执行 db upgrade 建立索引），关闭则使用 LIKE
+    FULLTEXT_SEARCH = True
+
+    # 批量导入：每批记录在一个事务中写入，失败明细最多返回 IMPORT_MAX_ERRORS 条
+    IMPORT_BATCH_SIZE = 500
+    IMPORT_MAX_ERRORS = 1000
+    EXPORT_BATCH_SIZE = 500  # 导出时每批读取的错题数
+    BULK_MAX_IDS = 1000  # 批量修改接口一次最多传入的错题 id 数
+    # 复习调度：sm2 或 fsrs；fsrs 按目标记忆保持率计算间隔，间隔最长 REVIEW_MAX_INTERVAL_DAYS 天
+    REVIEW_SCHEDULER = "sm2"
+    REVIEW_TARGET_RETENTION = 0.9
+    REVIEW_MAX_INTERVAL_DAYS = 365
+    # 近似重复检测：标题+内容的 MinHash 相似度（Jaccard 估计）不低于该值视为疑似重复
+    DUPLICATE_MIN_SIMILARITY = 0.7
+    # 随机抽题：候选 id 按 (用户, 条件) 缓存的条目数与最长存活时间（秒），版本变化时立即失效
+    SAMPLING_CACHE_SIZE = 64
+    SAMPLING_CACHE_TTL_SECONDS = 60
+
+    # 软删除数据清理：硬删除超过保留天数的已删除错题/科目及其选项、标签和上传文件
+    PURGE_RETENTION_DAYS = 30
+    PURGE_BATCH_SIZE = 200  # 每个事务删除的错题数
+    PURGE_INTERVAL_HOURS = 0  # 大于 0 时由应用进程定时清理，0 表示只通过命令行（cron）执行
+    PURGE_VACUUM = True  # 定时清理后执行增量 VACUUM，把空闲页归还给文件系统
+
+    # SQL 统计：每个 /api 请求统计查询次数/耗时，同一语句重复达到阈值视为疑似 N+1
+    SQL_PROFILING = True
+    SQL_PROFILE_HEADERS = None  # None 表示仅在 debug 模式下输出 X-DB-* 响应头
+    SQL_QUERY_BUDGET = 20  # 单个请求超过该查询数时记录 WARNING 日志
+    SQL_N_PLUS_ONE_THRESHOLD = 5
+
+    # SQLite 生产配置：每个新连接建立时依次执行以下 PRAGMA，置空则保持 SQLite 默认行为
+    SQLITE_PRAGMAS = {
+        "auto_vacuum": "INCREMENTAL",  # 新建库生效，已有库需执行一次 db vacuum；清理后可增量回收空间
+        "journal_mode": "WAL",  # 读写互不阻塞
+        "synchronous": "NORMAL",  # WAL 模式下安全且明显快于 FULL
+        "busy_timeout": 15000,  # 毫秒，遇到写锁时等待而不是直接报 database is locked
+        "mmap_size": 256 * 1024 * 1024,  # 256MB 内存映射读取
+        "cache_size": -64000,  # 负数表示 KiB，即约 64MB 页缓存
+        "temp_store": "MEMORY",  # 排序/临时表放在内存
+    }
+
     # 文件上传配置（保留用于兼容）
     UPLOAD_FOLDER = ROOT_DIR / "static" / "uploads" / "questions"
     MAX_UPLOAD_SIZE = 5 * 1024 * 1024  # 5MB
@@ -25,6 +76,14 @@ class Config:
     
     # Token 配置
     TOKEN_EXPIRATION_HOURS = 24  # Token 有效时间（小时），默认24小时
+    TOKEN_CACHE_SIZE = 1024  # 已验证 token 缓存的最大条目数
+    TOKEN_CACHE_TTL_SECONDS = 300  # 缓存条目最长存活时间（秒），同时不会超过 token 的 exp
+
+    # 密码哈希配置：method 需写完整参数，登录时参数不一致的旧哈希会被自动升级
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", "2"))  # 进程池大小，0 表示在请求线程内计算
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", "32"))  # 排队上限，超出返回 429
+    PASSWORD_HASH_TIMEOUT_SECONDS = 10  # 单次哈希最长等待时间
 
     # AI 模型配置（默认兼容 OpenAI / 通用 chat completion 接口）
     API_KEY = os.environ.get("API_KEY", "a1ffd117633d43c1b5d75f9261468910.u1QVyQm8QyYbAFzB")
@@ -0,0 +1,24 @@
+"""数据库结构迁移：就地升级已有数据库，不再依赖删库重建。"""
+
+from .runner import (
+    MIGRATIONS,
+    Migration,
+    applied_migrations,
+    current_version,
+    head_version,
+    migration,
+    pending_migrations,
+    upgrade,
+)
+from . import versions  # noqa: E402,F401  注册全部迁移
+
+__all__ = [
+    'MIGRATIONS',
+    'Migration',
+    'applied_migrations',
+    'current_version',
+    'head_version',
+    'migration',
+    'pending_migrations',
+    'upgrade',
+]
@@ -0,0 +1,46 @@
+"""迁移命令行：flask --app app db upgrade / current / history。"""
+import click
+from flask.cli import AppGroup
+
+from ..models import db
+from . import MIGRATIONS, applied_migrations, current_version, head_version, pending_migrations, upgrade
+
+db_cli = AppGroup("db", help="数据库结构迁移")
+
+
+@db_cli.command("upgrade")
+@click.option("--target", type=int, default=None, help="目标版本，默认升级到最新")
+def upgrade_command(target):
+    """执行尚未应用的迁移。"""
+    upgrade(db.engine, target=target, log=click.echo)
+
+
+@db_cli.command("current")
+def current_command():
+    """显示数据库当前版本与待执行的迁移。"""
+    click.echo(f"current: {current_version(db.engine)}  head: {head_version()}")
+    for item in pending_migrations(db.engine):
+        click.echo(f"pending {item.version}: {item.description}")
+
+
+@db_cli.command("history")
+def history_command():
+    """列出全部迁移及其应用时间。"""
+    applied = {row[0]: row[2] for row in applied_migrations(db.engine)}
+    for item in MIGRATIONS:
+        click.echo(f"{item.version:>4}  {applied.get(item.version) or 'pending':<19}  {item.description}")
+
+
+@db_cli.command("vacuum")
+def vacuum_command():
+    """整理数据库文件并启用 auto_vacuum=INCREMENTAL（期间独占数据库，请在维护时段执行）。"""
+    if db.engine.dialect.name != "sqlite":
+        raise click.ClickException("只支持 SQLite")
+    with db.engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        before = conn.exec_driver_sql("PRAGMA page_count").scalar()
+        conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
+        after = conn.exec_driver_sql("PRAGMA page_count").scalar()
+        page_size = conn.exec_driver_sql("PRAGMA page_size").scalar()
+    click.echo(f"reclaimed {(before - after) * page_size} bytes, auto_vacuum=incremental")
@@ -0,0 +1,166 @@
+"""迁移中可复用的结构变更操作。
+
+所有操作都可以重复执行：对象已存在时直接跳过，便于中断后重新运行 upgrade。
+每个步骤使用独立的短事务，避免在 SQLite 上长时间持有写锁。
+"""
+from __future__ import annotations
+
+import time
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from sqlalchemy import Column, Index, Table, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateColumn, CreateIndex, CreateTable
+
+
+def has_table(engine: Engine, table_name: str) -> bool:
+    return inspect(engine).has_table(table_name)
+
+
+def has_column(engine: Engine, table_name: str, column_name: str) -> bool:
+    return any(col["name"] == column_name for col in inspect(engine).get_columns(table_name))
+
+
+def has_index(engine: Engine, table_name: str, index_name: str) -> bool:
+    return any(idx["name"] == index_name for idx in inspect(engine).get_indexes(table_name))
+
+
+def create_table(engine: Engine, table: Table) -> bool:
+    """表不存在时按模型定义建表（连同其索引），返回是否实际创建。"""
+    if has_table(engine, table.name):
+        return False
+    table.create(engine)
+    return True
+
+
+def add_column(engine: Engine, table_name: str, column: Column) -> bool:
+    """ALTER TABLE ADD COLUMN，SQLite 上只改写表结构定义，不会重写数据。"""
+    if has_column(engine, table_name, column.name):
+        return False
+    ddl = CreateColumn(column).compile(dialect=engine.dialect)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {ddl}")
+    return True
+
+
+def create_index(engine: Engine, index: Index) -> bool:
+    """创建单个索引。
+
+    SQLite 建索引期间只持有写锁，WAL 模式下读请求不受影响；
+    每个索引单独一个事务，写请求最多等待一个索引的构建时间。
+    """
+    if has_index(engine, index.table.name, index.name):
+        return False
+    with engine.begin() as conn:
+        conn.execute(CreateIndex(index))
+    return True
+
+
+def create_indexes(engine: Engine, indexes: Iterable[Index]) -> List[str]:
+    return [index.name for index in indexes if create_index(engine, index)]
+
+
+def drop_index(engine: Engine, table_name: str, index_name: str) -> bool:
+    if not has_index(engine, table_name, index_name):
+        return False
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"DROP INDEX {index_name}")
+    return True
+
+
+def run_batched(engine: Engine, sql: str, batch_size: int = 1000, pause: float = 0.0, **params) -> int:
+    """分批执行 UPDATE/DELETE，直到影响行数为 0，返回总行数。
+
+    sql 中需要用 ``:batch_size`` 限定每批范围，例如::
+
+        UPDATE questions SET x = 1
+        WHERE id IN (SELECT id FROM questions WHERE x IS NULL LIMIT :batch_size)
+    """
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            affected = conn.execute(text(sql), {"batch_size": batch_size, **params}).rowcount
+        total += affected
+        if affected <= 0:
+            return total
+        if pause:
+            time.sleep(pause)
+
+
+def rebuild_table(
+    engine: Engine,
+    table: Table,
+    columns: Optional[List[str]] = None,
+    batch_size: int = 1000,
+    pause: float = 0.0,
+) -> int:
+    """按模型定义分批重建表（SQLite 修改列类型/约束的标准做法）。
+
+    1. 建立 ``<table>__new``，按主键分批拷贝旧数据，每批一个短事务；
+    2. 最后在一个 IMMEDIATE 事务里补齐拷贝期间新增/更新的行，
+       删除旧表、改名并重建索引。
+
+    columns 为两张表共同拥有、需要拷贝的列，默认取新定义中旧表也存在的列。
+    返回拷贝的行数。
+    """
+    name = table.name
+    tmp_name = f"{name}__new"
+    pk = list(table.primary_key.columns)[0].name
+    if columns is None:
+        old_columns = {col["name"] for col in inspect(engine).get_columns(name)}
+        columns = [col.name for col in table.columns if col.name in old_columns]
+    column_list = ", ".join(columns)
+    started_at = datetime.utcnow()
+
+    create_sql = str(CreateTable(table).compile(dialect=engine.dialect)).strip()
+    create_sql = create_sql.replace(f"CREATE TABLE {name} ", f"CREATE TABLE {tmp_name} ", 1)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {tmp_name}")
+        conn.exec_driver_sql(create_sql)
+
+    copy_sql = (
+        f"INSERT INTO {tmp_name} ({column_list}) SELECT {column_list} FROM {name} "
+        f"WHERE {pk} > ? ORDER BY {pk} LIMIT ?"
+    )
+    last_id = 0
+    copied = 0
+    while True:
+        with engine.begin() as conn:
+            affected = conn.exec_driver_sql(copy_sql, (last_id, batch_size)).rowcount
+            if affected <= 0:
+                break
+            last_id = conn.exec_driver_sql(f"SELECT MAX({pk}) FROM {tmp_name}").scalar()
+        copied += affected
+        if pause:
+            time.sleep(pause)
+
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            cursor.execute(
+                f"INSERT INTO {tmp_name} ({column_list}) SELECT {column_list} FROM {name} WHERE {pk} > ?",
+                (last_id,),
+            )
+            if "updated_at" in columns:
+                cursor.execute(
+                    f"INSERT OR REPLACE INTO {tmp_name} ({column_list}) "
+                    f"SELECT {column_list} FROM {name} WHERE updated_at >= ?",
+                    (started_at.strftime("%Y-%m-%d %H:%M:%S.%f"),),
+                )
+            cursor.execute(f"DELETE FROM {tmp_name} WHERE {pk} NOT IN (SELECT {pk} FROM {name})")
+            cursor.execute(f"DROP TABLE {name}")
+            cursor.execute(f"ALTER TABLE {tmp_name} RENAME TO {name}")
+            for index in table.indexes:
+                cursor.execute(str(CreateIndex(index).compile(dialect=engine.dialect)))
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        finally:
+            cursor.close()
+    finally:
+        raw.close()
+    return copied
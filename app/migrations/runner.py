@@ -0,0 +1,106 @@
+"""迁移注册与执行：按版本号顺序执行尚未应用的迁移，并记录到 schema_migrations。
+
+全新的空库先按模型建表，再依次执行全部迁移：FTS5 虚拟表等没有对应模型的对象
+只由迁移创建。迁移都可以重复执行，create_all 已经建好的表和索引会被跳过。
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+
+VERSION_TABLE = "schema_migrations"
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    upgrade: Callable[[Engine], None]
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, description: str):
+    """注册一个迁移。版本号必须递增且唯一。"""
+
+    def decorator(func: Callable[[Engine], None]) -> Callable[[Engine], None]:
+        if any(m.version == version for m in MIGRATIONS):
+            raise ValueError(f"重复的迁移版本号: {version}")
+        MIGRATIONS.append(Migration(version, description, func))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return func
+
+    return decorator
+
+
+def head_version() -> int:
+    return MIGRATIONS[-1].version if MIGRATIONS else 0
+
+
+def _ensure_version_table(engine: Engine) -> None:
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} ("
+            "version INTEGER PRIMARY KEY, "
+            "description VARCHAR(200) NOT NULL, "
+            "applied_at DATETIME NOT NULL)"
+        )
+
+
+def _record(engine: Engine, item: Migration) -> None:
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            f"INSERT OR REPLACE INTO {VERSION_TABLE} (version, description, applied_at) VALUES (?, ?, ?)",
+            (item.version, item.description, datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")),
+        )
+
+
+def current_version(engine: Engine) -> int:
+    """数据库当前的迁移版本，尚未纳入迁移管理时返回 0。"""
+    if not inspect(engine).has_table(VERSION_TABLE):
+        return 0
+    with engine.connect() as conn:
+        return conn.exec_driver_sql(f"SELECT MAX(version) FROM {VERSION_TABLE}").scalar() or 0
+
+
+def applied_migrations(engine: Engine) -> List[tuple]:
+    if not inspect(engine).has_table(VERSION_TABLE):
+        return []
+    with engine.connect() as conn:
+        return conn.exec_driver_sql(
+            f"SELECT version, description, applied_at FROM {VERSION_TABLE} ORDER BY version"
+        ).all()
+
+
+def pending_migrations(engine: Engine, target: Optional[int] = None) -> List[Migration]:
+    current = current_version(engine)
+    target = head_version() if target is None else target
+    return [m for m in MIGRATIONS if current < m.version <= target]
+
+
+def upgrade(engine: Engine, target: Optional[int] = None, log: Callable[[str], None] = print) -> int:
+    """把数据库升级到 target（默认最新）版本，返回升级后的版本号。
+
+    全新的空库先按模型建表；之后逐个执行待应用迁移（迁移均可重复执行，已存在的对象
+    会被跳过），每个迁移完成后立即记录版本，中途失败可以修复后重新执行。
+    """
+    from ..models import db
+
+    _ensure_version_table(engine)
+    existing = set(inspect(engine).get_table_names()) - {VERSION_TABLE}
+    if not existing:
+        db.metadata.create_all(engine)
+        log("created tables from models")
+
+    for item in pending_migrations(engine, target):
+        log(f"applying {item.version}: {item.description}")
+        item.upgrade(engine)
+        _record(engine, item)
+    version = current_version(engine)
+    log(f"database at version {version}")
+    return version
@@ -0,0 +1,202 @@
+"""迁移脚本。新增结构变更时在文件末尾追加一个递增版本号的函数。
+
+迁移直接引用模型中的 Table/Index 定义，只处理各自列出的对象，
+因此模型后续再增加的列或索引不会被早期迁移提前创建。
+"""
+from sqlalchemy.engine import Engine
+
+from ..models import db
+from ..services import search
+from . import ops
+from .runner import migration
+
+
+def _model_indexes(table_name: str, *names: str):
+    table = db.metadata.tables[table_name]
+    indexes = {index.name: index for index in table.indexes}
+    return [indexes[name] for name in names]
+
+
+@migration(1, "baseline schema")
+def baseline(engine: Engine) -> None:
+    # 旧版本 init_db.py 建出来的库已经包含这些表，这里只补建缺失的表
+    for name in ("users", "subjects", "questions", "question_options", "question_tags", "ai_chat_records"):
+        ops.create_table(engine, db.metadata.tables[name])
+
+
+@migration(2, "composite indexes for question, tag, option and chat queries")
+def question_indexes(engine: Engine) -> None:
+    ops.create_indexes(
+        engine,
+        _model_indexes(
+            "questions",
+            "ix_questions_user_deleted_created",
+            "ix_questions_user_deleted_review",
+            "ix_questions_user_deleted_last_review",
+            "ix_questions_user_deleted_mastery",
+            "ix_questions_user_deleted_important",
+            "ix_questions_user_deleted_subject",
+        )
+        + _model_indexes("subjects", "ix_subjects_user_deleted")
+        + _model_indexes("question_options", "ix_question_options_question_id")
+        + _model_indexes("question_tags", "ix_question_tags_question_id")
+        + _model_indexes("ai_chat_records", "ix_ai_chat_records_user_created"),
+    )
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+
+
+@migration(3, "full-text search index for questions")
+def question_fulltext(engine: Engine) -> None:
+    if search.create_index(engine):
+        search.rebuild_index(engine)
+
+
+@migration(4, "per-user tag dictionary with question counts")
+def tag_dictionary(engine: Engine) -> None:
+    from ..services.tags import refresh_counts
+
+    ops.create_table(engine, db.metadata.tables["tags"])
+    question_tags = db.metadata.tables["question_tags"]
+    ops.add_column(engine, "question_tags", question_tags.c.tag_id.copy())
+    ops.create_indexes(engine, _model_indexes("question_tags", "ix_question_tags_tag_question"))
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT OR IGNORE INTO tags (user_id, name, question_count, created_at) "
+            "SELECT DISTINCT q.user_id, qt.name, 0, CURRENT_TIMESTAMP "
+            "FROM question_tags qt JOIN questions q ON q.id = qt.question_id"
+        )
+    ops.run_batched(
+        engine,
+        "UPDATE question_tags SET tag_id = ("
+        "SELECT t.id FROM tags t JOIN questions q ON q.user_id = t.user_id "
+        "WHERE q.id = question_tags.question_id AND t.name = question_tags.name) "
+        "WHERE id IN (SELECT qt.id FROM question_tags qt JOIN tags t ON t.name = qt.name "
+        "JOIN questions q ON q.id = qt.question_id AND q.user_id = t.user_id "
+        "WHERE qt.tag_id IS NULL LIMIT :batch_size)",
+    )
+    with engine.begin() as conn:
+        tag_ids = [row[0] for row in conn.exec_driver_sql("SELECT id FROM tags")]
+        refresh_counts(conn, tag_ids)
+
+
+@migration(5, "questions updated_at index for list ETags")
+def question_updated_index(engine: Engine) -> None:
+    ops.create_indexes(engine, _model_indexes("questions", "ix_questions_user_deleted_updated"))
+
+
+@migration(6, "normalize image url columns to JSON arrays")
+def image_json_arrays(engine: Engine) -> None:
+    # SQLite 的 JSON 列仍以文本存储，这里把旧数据统一成 JSON 数组或 NULL，
+    # 保证按 JSON 类型加载时不会解析失败，json_array_length 等函数结果可靠
+    for column in ("images", "error_images", "answer_images"):
+        pending = f"SELECT id FROM questions WHERE {column} IS NOT NULL AND "
+        # 不是 JSON 的旧值视为单个 URL
+        ops.run_batched(
+            engine,
+            f"UPDATE questions SET {column} = json_array(trim({column})) WHERE id IN ("
+            f"{pending}trim({column}) <> '' AND json_valid({column}) = 0 LIMIT :batch_size)",
+        )
+        # JSON 字符串同样包装成数组
+        ops.run_batched(
+            engine,
+            f"UPDATE questions SET {column} = json_array(json_extract({column}, '$')) WHERE id IN ("
+            f"{pending}CASE WHEN json_valid({column}) THEN json_type({column}) = 'text' ELSE 0 END "
+            "LIMIT :batch_size)",
+        )
+        # 空串、空数组以及其他非数组值置为 NULL
+        ops.run_batched(
+            engine,
+            f"UPDATE questions SET {column} = NULL WHERE id IN ("
+            f"{pending}CASE WHEN json_valid({column}) "
+            f"THEN json_type({column}) <> 'array' OR json_array_length({column}) = 0 ELSE 1 END "
+            "LIMIT :batch_size)",
+        )
+
+
+@migration(7, "change sequence for incremental question sync")
+def question_change_seq(engine: Engine) -> None:
+    from ..services import changes
+
+    ops.create_table(engine, db.metadata.tables["sync_state"])
+    ops.add_column(engine, "questions", db.metadata.tables["questions"].c.change_seq.copy())
+    # 先把计数器推进到当前最大 id 并建立触发器，之后的写入都从更大的序号开始；
+    # 已有错题再按主键分批取 change_seq = id，触发器期间修改过的行不会被覆盖
+    with engine.begin() as conn:
+        max_id = conn.exec_driver_sql("SELECT COALESCE(MAX(id), 0) FROM questions").scalar()
+        conn.exec_driver_sql(
+            "INSERT INTO sync_state (name, value) VALUES (?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET value = MAX(value, excluded.value)",
+            (changes.SEQUENCE, max_id),
+        )
+        changes.create_triggers(conn)
+    for start in range(0, max_id, 1000):
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                "UPDATE questions SET change_seq = id WHERE id > ? AND id <= ? AND change_seq = 0",
+                (start, min(start + 1000, max_id)),
+            )
+    ops.create_indexes(engine, _model_indexes("questions", "ix_questions_user_change_seq"))
+
+
+@migration(8, "partial index on soft-deleted questions for purge")
+def question_purge_index(engine: Engine) -> None:
+    ops.create_indexes(engine, _model_indexes("questions", "ix_questions_deleted_updated"))
+
+
+@migration(9, "minhash lsh fingerprints for near-duplicate questions")
+def question_fingerprints(engine: Engine) -> None:
+    from ..services import duplicates
+
+    ops.create_table(engine, db.metadata.tables["question_fingerprints"])
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            ids = [
+                row[0]
+                for row in conn.exec_driver_sql(
+                    "SELECT id FROM questions WHERE id > ? ORDER BY id LIMIT 1000", (last_id,)
+                )
+            ]
+            if not ids:
+                break
+            duplicates.fingerprint_questions(conn, ids)
+        last_id = ids[-1]
+
+
+@migration(10, "spaced-repetition state and due-queue index")
+def review_schedule(engine: Engine) -> None:
+    ops.add_column(engine, "questions", db.metadata.tables["questions"].c.review_state.copy())
+    # 旧数据没有下次复习时间：未掌握的错题立即到期，已掌握的按 SM-2 第二次间隔 6 天后到期
+    ops.run_batched(
+        engine,
+        "UPDATE questions SET next_review_at = CASE WHEN review_status = 1 "
+        "THEN datetime(COALESCE(last_review_at, created_at, CURRENT_TIMESTAMP), '+6 days') "
+        "ELSE COALESCE(last_review_at, created_at, CURRENT_TIMESTAMP) END "
+        "WHERE id IN (SELECT id FROM questions WHERE next_review_at IS NULL LIMIT :batch_size)",
+    )
+    ops.create_indexes(engine, _model_indexes("questions", "ix_questions_user_deleted_next_review"))
+
+
+@migration(11, "append-only review event log")
+def review_events(engine: Engine) -> None:
+    from ..services import review_log
+
+    ops.create_table(engine, db.metadata.tables["review_events"])
+    with engine.begin() as conn:
+        review_log.create_triggers(conn)
+    # 旧数据只保存了最近一次复习，每道复习过的错题补一条事件，保留最近的活动记录
+    ops.run_batched(
+        engine,
+        "INSERT INTO review_events (user_id, question_id, result, reviewed_at) "
+        "SELECT q.user_id, q.id, COALESCE(NULLIF(q.mastery_status, ''), "
+        "CASE WHEN q.review_status = 1 THEN 'mastered' ELSE 'forgot' END), q.last_review_at "
+        "FROM questions q WHERE q.last_review_at IS NOT NULL "
+        "AND NOT EXISTS (SELECT 1 FROM review_events e WHERE e.question_id = q.id) "
+        "ORDER BY q.id LIMIT :batch_size",
+    )
+
+
+@migration(12, "password change time for token revocation")
+def user_password_changed_at(engine: Engine) -> None:
+    ops.add_column(engine, "users", db.metadata.tables["users"].c.password_changed_at.copy())
@@ -6,8 +6,10 @@ from flask_sqlalchemy import SQLAlchemy
 db = SQLAlchemy()
 
 from .user import User  # noqa: E402
-from .question import Subject, Question, QuestionOption, QuestionTag  # noqa: E402
+from .question import Subject, Question, QuestionFingerprint, QuestionOption, QuestionTag, Tag  # noqa: E402
 from .chat import AIChatRecord  # noqa: E402
+from .sync import SyncState  # noqa: E402
+from .review import ReviewEvent  # noqa: E402
 
 __all__ = [
     'db',
@@ -16,5 +18,9 @@ __all__ = [
     'Question',
     'QuestionOption',
     'QuestionTag',
+    'QuestionFingerprint',
+    'Tag',
     'AIChatRecord',
+    'SyncState',
+    'ReviewEvent',
 ]
@@ -9,6 +9,9 @@ class AIChatRecord(db.Model):
     """保存每次 AI 聊天对话记录。"""
 
     __tablename__ = "ai_chat_records"
+    __table_args__ = (
+        db.Index("ix_ai_chat_records_user_created", "user_id", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
@@ -1,12 +1,18 @@
 """Models for subjects and questions."""
-import json
 from datetime import datetime
-from typing import List, Optional
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import FetchedValue
+from sqlalchemy.orm import joinedload, load_only, selectinload
+
 from . import db
 
 
 class Subject(db.Model):
     __tablename__ = "subjects"
+    __table_args__ = (
+        db.Index("ix_subjects_user_deleted", "user_id", "is_deleted"),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
@@ -41,6 +47,23 @@ class Subject(db.Model):
 
 class Question(db.Model):
     __tablename__ = "questions"
+    # 几乎所有查询都以 (user_id, is_deleted) 开头，再按下列字段过滤或排序
+    __table_args__ = (
+        db.Index("ix_questions_user_deleted_created", "user_id", "is_deleted", "created_at"),
+        db.Index("ix_questions_user_deleted_review", "user_id", "is_deleted", "review_status", "created_at"),
+        db.Index("ix_questions_user_deleted_last_review", "user_id", "is_deleted", "last_review_at"),
+        # 复习队列：到期错题是该索引上的一段范围
+        db.Index("ix_questions_user_deleted_next_review", "user_id", "is_deleted", "next_review_at"),
+        db.Index("ix_questions_user_deleted_mastery", "user_id", "is_deleted", "mastery_status"),
+        db.Index("ix_questions_user_deleted_important", "user_id", "is_deleted", "is_important", "created_at"),
+        db.Index("ix_questions_user_deleted_subject", "user_id", "is_deleted", "subject_id", "created_at"),
+        # 列表 ETag 的 max(updated_at) 与总数可以只扫描索引
+        db.Index("ix_questions_user_deleted_updated", "user_id", "is_deleted", "updated_at"),
+        # 增量同步按变更序号顺序读取，包含已删除的错题（墓碑）
+        db.Index("ix_questions_user_change_seq", "user_id", "change_seq"),
+        # 只包含已删除错题的部分索引，清理任务按删除时间查找过期数据
+        db.Index("ix_questions_deleted_updated", "updated_at", sqlite_where=db.text("is_deleted = 1")),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
@@ -54,109 +77,182 @@ class Question(db.Model):
     review_status = db.Column(db.Integer, nullable=False, default=0)
     review_count = db.Column(db.Integer, nullable=False, default=0)
     last_review_at = db.Column(db.DateTime)
-    next_review_at = db.Column(db.DateTime)
+    # 下次复习时间，由复习调度算法计算（services/scheduler.py）；新错题立即到期
+    next_review_at = db.Column(db.DateTime, default=datetime.utcnow)
+    review_state = db.Column(db.JSON(none_as_null=True), nullable=True)  # 调度算法状态（ease/stability 等）
     is_important = db.Column(db.Boolean, nullable=False, default=False)
     is_mastered = db.Column(db.Boolean, nullable=False, default=False)
     mastery_status = db.Column(db.String(20), nullable=True)  # 掌握状态：forgot（忘记了）、hard（有点难）、mastered（已掌握）
     is_deleted = db.Column(db.Boolean, nullable=False, default=False)
-    images = db.Column(db.Text, nullable=True)  # JSON格式存储图片URL列表（题目图片）
-    error_images = db.Column(db.Text, nullable=True)  # JSON格式存储错误解析图片/文件URL列表
-    answer_images = db.Column(db.Text, nullable=True)  # JSON格式存储答案图片/文件URL列表
+    # 图片/文件 URL 列表以 JSON 数组存储，加载行时由列类型解析一次；没有图片时为 NULL
+    images = db.Column(db.JSON(none_as_null=True), nullable=True)  # 题目图片
+    error_images = db.Column(db.JSON(none_as_null=True), nullable=True)  # 错误解析图片/文件
+    answer_images = db.Column(db.JSON(none_as_null=True), nullable=True)  # 答案图片/文件
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # 变更序号，由数据库触发器在每次插入/更新后分配（见 services/changes.py）
+    change_seq = db.Column(db.Integer, nullable=False, server_default="0", server_onupdate=FetchedValue())
 
+    # 关联默认延迟加载，由各接口通过 load_options() 指定需要预加载的内容
     subject = db.relationship("Subject", back_populates="questions")
     options = db.relationship(
         "QuestionOption",
         cascade="all, delete-orphan",
         back_populates="question",
-        lazy="selectin",
     )
     tags = db.relationship(
         "QuestionTag",
         cascade="all, delete-orphan",
         back_populates="question",
-        lazy="selectin",
     )
 
+    @classmethod
+    def load_options(cls, profile: str = "brief", fields: Optional[Iterable[str]] = None) -> tuple:
+        """按响应类型返回加载策略，查询次数与分页大小无关。
+
+        - brief：列表（to_brief_dict），科目 JOIN + 标签 1 次 selectin
+        - review：复习卡片，只 JOIN 科目名称
+        - exam：试卷，只 JOIN 科目名称
+        - detail：详情（to_detail_dict），科目 JOIN + 标签、选项各 1 次 selectin
+
+        传入 fields（稀疏字段集）时忽略 profile，只加载这些字段依赖的列和关联。
+        """
+        if fields is not None:
+            return cls._field_load_options(fields)
+        subject_brief = joinedload(cls.subject).load_only(Subject.name, Subject.color)
+        if profile == "brief":
+            return (subject_brief, selectinload(cls.tags))
+        if profile in ("review", "exam"):
+            return (joinedload(cls.subject).load_only(Subject.name),)
+        if profile == "detail":
+            return (subject_brief, selectinload(cls.tags), selectinload(cls.options))
+        raise ValueError(f"未知的加载策略: {profile}")
+
+    @classmethod
+    def _field_load_options(cls, fields: Iterable[str]) -> tuple:
+        # created_at、updated_at 始终加载：游标分页需要用它们生成 next_cursor 和 ETag
+        columns = {"created_at", "updated_at"}
+        for name in fields:
+            columns.update(FIELD_SOURCES[name])
+        relations = columns & {"subject", "tags", "options"}
+        columns -= relations
+        options = [load_only(*(getattr(cls, column) for column in sorted(columns)))]
+        if "subject" in relations:
+            options.append(joinedload(cls.subject).load_only(Subject.name, Subject.color))
+        if "tags" in relations:
+            options.append(selectinload(cls.tags))
+        if "options" in relations:
+            options.append(selectinload(cls.options))
+        return tuple(options)
+
+    @staticmethod
+    def parse_fields(value: Optional[str], profile: str) -> Optional[Tuple[str, ...]]:
+        """解析 fields=id,title,... 参数，未传时返回 None（完整输出）。
+
+        字段必须属于该接口的完整输出，否则抛出 ValueError；id 总会包含在内。
+        """
+        if value is None or not value.strip():
+            return None
+        allowed = PROFILE_FIELDS[profile]
+        requested = [name.strip() for name in value.split(",") if name.strip()]
+        unknown = [name for name in requested if name not in allowed]
+        if unknown:
+            raise ValueError(f"不支持的字段：{', '.join(unknown)}")
+        return tuple(dict.fromkeys(["id", *requested]))
+
+    @staticmethod
+    def _url_list(value) -> List[str]:
+        return value if isinstance(value, list) else []
+
     def _get_images(self) -> List[str]:
         """获取图片URL列表（题目图片）"""
-        if not self.images:
-            return []
-        try:
-            return json.loads(self.images)
-        except (json.JSONDecodeError, TypeError):
-            return []
+        return self._url_list(self.images)
 
     def _set_images(self, image_list: List[str]) -> None:
         """设置图片URL列表（题目图片）"""
-        if image_list:
-            self.images = json.dumps(image_list)
-        else:
-            self.images = None
+        self.images = list(image_list) if image_list else None
 
     def _get_error_images(self) -> List[str]:
         """获取错误解析图片/文件URL列表"""
-        if not self.error_images:
-            return []
-        try:
-            return json.loads(self.error_images)
-        except (json.JSONDecodeError, TypeError):
-            return []
+        return self._url_list(self.error_images)
 
     def _get_answer_images(self) -> List[str]:
         """获取答案图片/文件URL列表"""
-        if not self.answer_images:
-            return []
-        try:
-            return json.loads(self.answer_images)
-        except (json.JSONDecodeError, TypeError):
-            return []
+        return self._url_list(self.answer_images)
+
+    def to_fields_dict(self, fields: Iterable[str]) -> dict:
+        """只序列化指定字段，未请求的列和关联不会被访问。"""
+        return {name: FIELD_GETTERS[name](self) for name in fields}
 
     def to_brief_dict(self) -> dict:
-        return {
-            "id": self.id,
-            "title": self.title,
-            "subject_id": self.subject_id,
-            "subject_name": self.subject.name if self.subject else None,
-            "subject_color": self.subject.color if self.subject else None,
-            "difficulty": self.difficulty,
-            "question_type": self.question_type,
-            "review_status": self.review_status,
-            "mastery_status": self.mastery_status,
-            "error_reason": self.error_reason,
-            "created_at": self.created_at.strftime("%Y-%m-%d %H:%M:%S") if self.created_at else None,
-            "tags": [tag.name for tag in self.tags],
-            "images": self._get_images(),
-        }
+        return self.to_fields_dict(BRIEF_FIELDS)
 
     def to_detail_dict(self) -> dict:
-        data = self.to_brief_dict()
-        data.update(
-            {
-                "content": self.content,
-                "answer": self.answer,
-                "error_reason": self.error_reason,
-                "options": [option.to_dict() for option in self.options],
-                "review_count": self.review_count,
-                "last_review_at": self.last_review_at.strftime("%Y-%m-%d %H:%M:%S") if self.last_review_at else None,
-                "next_review_at": self.next_review_at.strftime("%Y-%m-%d %H:%M:%S") if self.next_review_at else None,
-                "is_important": self.is_important,
-                "is_mastered": self.is_mastered,
-                "mastery_status": self.mastery_status,
-                "images": self._get_images(),
-                "error_images": self._get_error_images(),
-                "answer_images": self._get_answer_images(),
-            }
-        )
-        return data
+        return self.to_fields_dict(DETAIL_FIELDS)
+
+
+def _format_datetime(value: Optional[datetime]) -> Optional[str]:
+    return value.strftime("%Y-%m-%d %H:%M:%S") if value else None
+
+
+# 输出字段 -> 取值函数
+FIELD_GETTERS: Dict[str, Callable[[Question], object]] = {
+    "id": lambda q: q.id,
+    "title": lambda q: q.title,
+    "subject_id": lambda q: q.subject_id,
+    "subject_name": lambda q: q.subject.name if q.subject else None,
+    "subject_color": lambda q: q.subject.color if q.subject else None,
+    "difficulty": lambda q: q.difficulty,
+    "question_type": lambda q: q.question_type,
+    "review_status": lambda q: q.review_status,
+    "mastery_status": lambda q: q.mastery_status,
+    "error_reason": lambda q: q.error_reason,
+    "created_at": lambda q: _format_datetime(q.created_at),
+    "tags": lambda q: [tag.name for tag in q.tags],
+    "images": lambda q: q._get_images(),
+    "content": lambda q: q.content,
+    "answer": lambda q: q.answer,
+    "options": lambda q: [option.to_dict() for option in q.options],
+    "review_count": lambda q: q.review_count,
+    "last_review_at": lambda q: _format_datetime(q.last_review_at),
+    "next_review_at": lambda q: _format_datetime(q.next_review_at),
+    "is_important": lambda q: q.is_important,
+    "is_mastered": lambda q: q.is_mastered,
+    "error_images": lambda q: q._get_error_images(),
+    "answer_images": lambda q: q._get_answer_images(),
+}
+
+# 输出字段 -> 依赖的列或关联，供 load_only / 关联预加载使用
+FIELD_SOURCES: Dict[str, Tuple[str, ...]] = {
+    "subject_name": ("subject",),
+    "subject_color": ("subject",),
+    **{
+        name: (name,)
+        for name in FIELD_GETTERS
+        if name not in ("subject_name", "subject_color")
+    },
+}
+
+BRIEF_FIELDS = (
+    "id", "title", "subject_id", "subject_name", "subject_color", "difficulty", "question_type",
+    "review_status", "mastery_status", "error_reason", "created_at", "tags", "images",
+)
+DETAIL_FIELDS = BRIEF_FIELDS + (
+    "content", "answer", "options", "review_count", "last_review_at", "next_review_at",
+    "is_important", "is_mastered", "error_images", "answer_images",
+)
+REVIEW_FIELDS = (
+    "id", "title", "content", "answer", "error_reason", "difficulty", "review_count",
+    "last_review_at", "subject_id", "subject_name", "mastery_status",
+)
+PROFILE_FIELDS = {"brief": BRIEF_FIELDS, "detail": DETAIL_FIELDS, "review": REVIEW_FIELDS}
 
 
 class QuestionOption(db.Model):
     __tablename__ = "question_options"
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    question_id = db.Column(db.Integer, db.ForeignKey("questions.id"), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey("questions.id"), nullable=False, index=True)
     option_key = db.Column(db.String(5), nullable=False)
     option_text = db.Column(db.Text, nullable=False)
     is_correct = db.Column(db.Boolean, nullable=False, default=False)
@@ -175,18 +271,68 @@ class QuestionOption(db.Model):
         }
 
 
+class Tag(db.Model):
+    """用户级标签字典，question_count 为引用该标签的未删除错题数（写入时维护）。"""
+
+    __tablename__ = "tags"
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "name", name="uq_tags_user_name"),
+        db.Index("ix_tags_user_count", "user_id", "question_count"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    name = db.Column(db.String(50), nullable=False)
+    question_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "question_count": self.question_count,
+        }
+
+
 class QuestionTag(db.Model):
+    """错题与标签的关联，name 冗余保存标签名称以便直接序列化。"""
+
     __tablename__ = "question_tags"
+    __table_args__ = (
+        db.Index("ix_question_tags_tag_question", "tag_id", "question_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    question_id = db.Column(db.Integer, db.ForeignKey("questions.id"), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey("questions.id"), nullable=False, index=True)
+    tag_id = db.Column(db.Integer, db.ForeignKey("tags.id"), nullable=True)
     name = db.Column(db.String(50), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     question = db.relationship("Question", back_populates="tags")
+    tag = db.relationship("Tag")
 
     def to_dict(self) -> dict:
         return {
             "id": self.id,
             "name": self.name,
         }
+
+
+class QuestionFingerprint(db.Model):
+    """错题标题+内容的 MinHash 签名，按 LSH 分段拆成多行，用于查找近似重复的错题。
+
+    band_hash 为某一段签名值的摘要，两道错题只要有一段签名完全相同就会落到同一个 band_hash，
+    因此只需按 (user_id, band_hash) 索引查找候选，再用完整签名估算相似度。
+    完整签名只保存在 band_no = 0 的行上。
+    """
+
+    __tablename__ = "question_fingerprints"
+    __table_args__ = (
+        db.Index("ix_question_fingerprints_user_band", "user_id", "band_hash", "question_id"),
+    )
+
+    question_id = db.Column(db.Integer, db.ForeignKey("questions.id"), primary_key=True)
+    band_no = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    band_hash = db.Column(db.BigInteger, nullable=False)
+    signature = db.Column(db.LargeBinary, nullable=True)
@@ -0,0 +1,41 @@
+"""复习事件日志。"""
+from datetime import datetime
+
+from . import db
+
+
+class ReviewEvent(db.Model):
+    """每次提交复习结果追加一行，只插入不修改（数据库触发器禁止 UPDATE）。
+
+    questions 上只保留最近一次的复习状态，历史活动（每日复习量、连续天数）和
+    调度算法需要的完整复习序列都从这张表按时间范围读取。
+    """
+
+    __tablename__ = "review_events"
+    __table_args__ = (
+        # 按用户和时间范围统计活动，包含 question_id 以便只扫描索引去重
+        db.Index("ix_review_events_user_reviewed", "user_id", "reviewed_at", "question_id"),
+        # 单题复习历史
+        db.Index("ix_review_events_question_reviewed", "question_id", "reviewed_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey("questions.id"), nullable=False)
+    result = db.Column(db.String(20), nullable=False)  # forgot / hard / mastered
+    reviewed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # 距离该题上一次复习的秒数，首次复习为 NULL
+    elapsed_seconds = db.Column(db.Integer, nullable=True)
+    duration_ms = db.Column(db.Integer, nullable=True)  # 客户端上报的作答用时
+    interval_days = db.Column(db.Integer, nullable=True)  # 本次复习后调度的间隔天数
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "question_id": self.question_id,
+            "result": self.result,
+            "reviewed_at": self.reviewed_at.strftime("%Y-%m-%d %H:%M:%S") if self.reviewed_at else None,
+            "elapsed_seconds": self.elapsed_seconds,
+            "duration_ms": self.duration_ms,
+            "interval_days": self.interval_days,
+        }
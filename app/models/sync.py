@@ -0,0 +1,11 @@
+"""增量同步使用的序列状态。"""
+from . import db
+
+
+class SyncState(db.Model):
+    """按名称保存的单调递增计数，例如错题变更序号、已清理的最大序号。"""
+
+    __tablename__ = "sync_state"
+
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
@@ -2,6 +2,7 @@ from datetime import datetime
 from typing import Optional
 
 from . import db
+from ..services.token_cache import token_cache
 
 
 class User(db.Model):
@@ -18,6 +19,8 @@ class User(db.Model):
     bio = db.Column(db.Text)  # 个人简介
     created_at = db.Column(db.DateTime, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now)
+    # 最近一次修改密码的时间（UTC），签发时间早于它的 token 一律视为失效
+    password_changed_at = db.Column(db.DateTime, nullable=True)
     
     def __repr__(self):
         return f"<User(id={self.id}, username='{self.username}', nickname='{self.nickname}')>"
@@ -43,12 +46,16 @@ class User(db.Model):
                 setattr(self, key, value)
         self.updated_at = datetime.now()
         db.session.commit()
+        token_cache.invalidate_user(self.id)
     
     def update_password(self, new_password_hash: str):
-        """更新密码"""
+        """更新密码，此前签发的 token 全部失效"""
         self.password_hash = new_password_hash
         self.updated_at = datetime.now()
+        self.password_changed_at = datetime.utcnow()
         db.session.commit()
+        # 缓存中的 token 跳过了签发时间检查，需要清除，让它们重新校验
+        token_cache.invalidate_user(self.id)
     
     @classmethod
     def create(cls, username: str, password_hash: str, nickname: Optional[str] = None) -> 'User':
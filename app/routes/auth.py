@@ -2,13 +2,16 @@ from typing import Optional
 from datetime import datetime, timedelta
 
 from flask import Blueprint, request
-from werkzeug.security import check_password_hash, generate_password_hash
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 import jwt
 
-from ..models import User
+from ..models import db, User
 from ..utils.response import Response
 from ..config import Config
+from ..services.current_user import CurrentUser
+from ..services.password_hasher import HasherBusyError, password_hasher
+from ..services.token_cache import TokenPrincipal, token_cache
 
 
 auth_bp = Blueprint("auth", __name__)
@@ -20,7 +23,10 @@ def register_user():
     username = (payload.get("username") or "").strip()
     password = payload.get("password") or ""
 
-    password_hash = generate_password_hash(password)
+    try:
+        password_hash = password_hasher.hash(password)
+    except HasherBusyError as exc:
+        return Response.too_many_requests(str(exc))
     nickname = username.split("@")[0] if "@" in username else username
 
     try:
@@ -38,8 +44,19 @@ def login_user():
     password = payload.get("password") or ""
 
     user = User.find_by_username(username)
-    if not user or not check_password_hash(user.password_hash, password):
-        return Response.error("账号或密码错误")
+    try:
+        if not user or not password_hasher.verify(user.password_hash, password):
+            return Response.error("账号或密码错误")
+    except HasherBusyError as exc:
+        return Response.too_many_requests(str(exc))
+
+    # 旧参数生成的哈希在登录成功时透明升级，繁忙时跳过，下次登录再升级
+    if password_hasher.needs_rehash(user.password_hash):
+        try:
+            user.password_hash = password_hasher.hash(password)
+            db.session.commit()
+        except HasherBusyError:
+            pass
 
     user_dict = user.to_dict()
     
@@ -48,11 +65,12 @@ def login_user():
     now = datetime.utcnow()
     expires_at = now + timedelta(hours=expiration_hours)
     
-    # 生成 JWT token，exp 和 iat 需要使用 Unix 时间戳（整数）
+    # 生成 JWT token，exp 和 iat 需要使用 Unix 时间戳；iat 保留小数，
+    # 与 password_changed_at 比较时不会因为同一秒内签发而误判
     payload = {
         'user_id': user.id,
         'exp': int(expires_at.timestamp()),  # 过期时间戳
-        'iat': int(now.timestamp())  # 签发时间戳
+        'iat': now.timestamp()  # 签发时间戳
     }
     token = jwt.encode(payload, Config.SECRET_KEY, algorithm='HS256')
     # PyJWT 2.0+ 返回字符串，旧版本返回 bytes
@@ -62,11 +80,32 @@ def login_user():
     return Response.success(data={"token": token, "user_info": user_dict}, message="登录成功")
 
 
-def get_user_by_token(token: str) -> Optional["User"]:
-    """根据 JWT token 获取用户，如果 token 无效或已过期则返回 None"""
+def token_revoked(issued_at: float, password_changed_at: Optional[datetime]) -> bool:
+    """token 是否签发于最近一次修改密码之前。
+
+    iat 与 password_changed_at 都按登录时相同的方式由 UTC 时间换算为时间戳；
+    旧版本签发的整数 iat 向下取整，只会更早，不会让已失效的 token 通过。
+    """
+    if password_changed_at is None:
+        return False
+    return issued_at < password_changed_at.timestamp()
+
+
+def get_user_by_token(token: str) -> Optional[CurrentUser]:
+    """根据 JWT token 获取当前用户，如果 token 无效或已过期则返回 None
+
+    返回的 CurrentUser 只由 token 声明构造，处理函数访问资料字段时才会按需加载 User。
+    缓存未命中时解码 token，并查询一次用户的 password_changed_at：用户不存在或
+    token 签发于修改密码之前时视为失效。校验通过的 token 会放入 token_cache，之后同一个 token 的请求
+    不再解码和查询；修改密码时会清除该用户的缓存条目。
+    """
     if not token:
         return None
-    
+
+    principal = token_cache.get(token)
+    if principal is not None:
+        return CurrentUser(principal)
+
     try:
         # 解码 JWT token，自动验证签名和过期时间
         payload = jwt.decode(token, Config.SECRET_KEY, algorithms=['HS256'])
@@ -75,12 +114,24 @@ def get_user_by_token(token: str) -> Optional["User"]:
         if not user_id:
             return None
         
-        # 从数据库获取用户
-        return User.query.get(user_id)
+        principal = TokenPrincipal(
+            user_id=int(user_id),
+            expires_at=int(payload.get('exp') or 0),
+            issued_at=float(payload.get('iat') or 0),
+        )
+        row = db.session.execute(
+            select(User.password_changed_at).where(User.id == principal.user_id)
+        ).first()
+        if row is None or token_revoked(principal.issued_at, row.password_changed_at):
+            return None
+        token_cache.put(token, principal)
+        return CurrentUser(principal)
+    except (TypeError, ValueError):
+        # user_id 声明格式不正确
+        return None
     except jwt.ExpiredSignatureError:
         # token 已过期
         return None
     except jwt.InvalidTokenError:
         # token 无效
         return None
-
@@ -6,6 +6,7 @@ from flask import Blueprint, g
 from sqlalchemy import func
 
 from app.models import db, Question, Subject
+from app.services import review_log
 from app.utils.response import Response
 
 dashboard_bp = Blueprint("dashboard", __name__, url_prefix="/api/dashboard")
@@ -33,16 +34,10 @@ def dashboard_stats():
     # 待复习数
     pending_count = base_query.filter(Question.review_status == 0).count()
     
-    # 本周新增复习数（从本周一开始）
+    # 本周新增复习数（从本周一开始，本周复习结果为已掌握的不同错题数）
     today = datetime.utcnow().date()
     week_start = today - timedelta(days=today.weekday())
-    week_start_datetime = datetime.combine(week_start, datetime.min.time())
-    week_reviewed_count = (
-        base_query.filter(
-            Question.last_review_at >= week_start_datetime,
-            Question.review_status == 1,
-        ).count()
-    )
+    week_reviewed_count = review_log.reviewed_count(user_id, week_start, today, "mastered")
     
     data = {
         "total_count": total_count,
@@ -93,33 +88,15 @@ def subject_distribution():
 
 @dashboard_bp.route("/review-trend", methods=["GET"])
 def review_trend():
-    """返回最近7天的复习趋势数据"""
+    """返回最近7天的复习趋势数据（每天复习过的不同错题数）"""
     user_id = g.current_user.id
     today = datetime.utcnow().date()
-    
-    # 获取最近7天的日期
-    dates = []
-    counts = []
-    for i in range(6, -1, -1):  # 从6天前到今天
-        date = today - timedelta(days=i)
-        date_start = datetime.combine(date, datetime.min.time())
-        date_end = date_start + timedelta(days=1)
-        
-        count = (
-            Question.query.filter_by(user_id=user_id, is_deleted=False)
-            .filter(
-                Question.last_review_at >= date_start,
-                Question.last_review_at < date_end,
-            )
-            .count()
-        )
-        
-        dates.append(date.strftime("%m/%d"))
-        counts.append(count)
-    
+
+    # 一条按天聚合的查询取出最近7天（从6天前到今天）的复习量
+    daily = review_log.daily_counts(user_id, today, 7)
     data = {
-        "dates": dates,
-        "counts": counts,
+        "dates": [day.strftime("%m/%d") for day in daily],
+        "counts": list(daily.values()),
     }
     return Response.success(data)
 
@@ -148,3 +125,29 @@ def mastery_status():
     
     return Response.success(data)
 
+
+@dashboard_bp.route("/attachments", methods=["GET"])
+def attachment_stats():
+    """统计图片/附件数量：在数据库中用 JSON 函数计算，不加载错题行"""
+    user_id = g.current_user.id
+
+    def count_of(column):
+        return func.coalesce(func.json_array_length(column), 0)
+
+    row = (
+        db.session.query(
+            func.count(Question.id).filter(count_of(Question.images) > 0),
+            func.sum(count_of(Question.images)),
+            func.sum(count_of(Question.error_images)),
+            func.sum(count_of(Question.answer_images)),
+        )
+        .filter(Question.user_id == user_id, Question.is_deleted.is_(False))
+        .one()
+    )
+    data = {
+        "questions_with_images": row[0] or 0,
+        "images": row[1] or 0,
+        "error_images": row[2] or 0,
+        "answer_images": row[3] or 0,
+    }
+    return Response.success(data)
@@ -1,23 +1,17 @@
 """出卷自测相关接口"""
 from datetime import datetime
-from typing import Any, List, Dict
+from typing import List, Dict
 
 from flask import Blueprint, g, request
-from sqlalchemy import func
 
 from app.models import db, Question, Subject
+from app.services import sampling
+from app.utils.params import to_int
 from app.utils.response import Response
 
 exams_bp = Blueprint("exams", __name__, url_prefix="/api/exam")
 
 
-def _to_int(value: Any, default: int = 0) -> int:
-    try:
-        return int(value)
-    except (TypeError, ValueError):
-        return default
-
-
 @exams_bp.route("/generate", methods=["POST"])
 def generate_exam():
     """生成试卷"""
@@ -25,10 +19,16 @@ def generate_exam():
     payload = request.get_json(silent=True) or {}
     
     # 获取参数
-    question_count = _to_int(payload.get("question_count", 20))
+    question_count = to_int(payload.get("question_count", 20))
     difficulty_mode = payload.get("difficulty_mode", "all")  # all, simple, medium, hard
     question_mode = payload.get("question_mode", "random")  # random, unreviewed, important
-    time_limit = _to_int(payload.get("time_limit", 0))  # 分钟，0为不限时
+    time_limit = to_int(payload.get("time_limit", 0))  # 分钟，0为不限时
+    try:
+        seed = sampling.parse_seed(payload.get("seed"))  # 传入相同 seed 可复现同一份试卷
+    except ValueError as exc:
+        return Response.bad_request(str(exc))
+    if seed is None:
+        seed = sampling.new_seed()
 
     if question_count < 5 or question_count > 50:
         return Response.error("题目数量应在5-50之间")
@@ -52,20 +52,22 @@ def generate_exam():
         query = query.filter(Question.is_important.is_(True))
     # random 不额外筛选
     
-    # 获取总数
-    total = query.count()
-    if total == 0:
+    # 只读取候选 id 后随机抽样，再按主键加载抽中的题目
+    ids = sampling.candidate_ids(query, user_id)
+    if not ids:
         return Response.error("没有符合条件的错题")
     
     # 随机抽取题目
-    actual_count = min(question_count, total)
-    questions = query.order_by(func.random()).limit(actual_count).all()
+    actual_count = min(question_count, len(ids))
+    picked = sampling.pick(ids, actual_count, seed)
+    questions = sampling.load_in_order(query, picked, Question.load_options("exam"))
     
     # 构建返回数据
     data = {
         "exam_id": None,  # 暂时不保存试卷记录
-        "question_count": actual_count,
+        "question_count": len(questions),
         "time_limit": time_limit,
+        "seed": seed,
         "questions": [
             {
                 "id": q.id,
@@ -93,7 +95,7 @@ def submit_exam():
     # 获取参数
     question_ids = payload.get("question_ids", [])  # 题目ID列表
     answers = payload.get("answers", {})  # {question_id: "用户答案"}
-    time_used = _to_int(payload.get("time_used", 0))  # 用时（秒）
+    time_used = to_int(payload.get("time_used", 0))  # 用时（秒）
     
     if not question_ids or not isinstance(question_ids, list):
         return Response.error("题目ID列表不能为空")
@@ -168,7 +170,7 @@ def save_wrong_question():
     user_id = g.current_user.id
     payload = request.get_json(silent=True) or {}
     
-    question_id = _to_int(payload.get("question_id"))
+    question_id = to_int(payload.get("question_id"))
     error_reason = payload.get("error_reason", "").strip()
     
     if not question_id:
@@ -1,7 +1,7 @@
 import os
 from flask import Blueprint, request, current_app, g
-from werkzeug.security import generate_password_hash, check_password_hash
 
+from ..services.password_hasher import HasherBusyError, password_hasher
 from ..utils.response import Response
 from .upload import _process_file_upload
 
@@ -69,7 +69,7 @@ def change_password():
             return Response.error("请输入当前密码和新密码")
         
         # 验证当前密码
-        if not check_password_hash(g.current_user.password_hash, old_password):
+        if not password_hasher.verify(g.current_user.password_hash, old_password):
             return Response.error("当前密码不正确")
         
         # 验证新密码长度
@@ -77,11 +77,13 @@ def change_password():
             return Response.error("新密码长度应在6-10位之间")
         
         # 更新密码
-        new_password_hash = generate_password_hash(new_password)
+        new_password_hash = password_hasher.hash(new_password)
         g.current_user.update_password(new_password_hash)
         
         return Response.success(message="密码修改成功")
         
+    except HasherBusyError as e:
+        return Response.too_many_requests(str(e))
     except Exception as e:
         current_app.logger.error(f"修改密码失败: {str(e)}")
         return Response.error("修改密码失败")
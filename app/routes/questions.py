@@ -1,13 +1,15 @@
 """错题相关接口：列表、详情、增删改与图片上传。"""
+import base64
+import binascii
 import json
 import os
 import uuid
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
-from flask import Blueprint, g, request, current_app
+from flask import Blueprint, g, request, current_app, Response as FlaskResponse, stream_with_context
 from werkzeug.utils import secure_filename
-from sqlalchemy import or_
+from sqlalchemy import and_, func, or_, select, update
 
 from app.models import (
     db,
@@ -16,23 +18,20 @@ from app.models import (
     QuestionOption,
     QuestionTag,
 )
+from app.utils.etag import make_etag, not_modified, request_signature, with_etag
+from app.utils.params import to_int
 from app.utils.response import Response
 from app.config import Config
+from app.services import changes, duplicates, question_io, search
+from app.services import tags as tags_service
 
 questions_bp = Blueprint("questions", __name__, url_prefix="/api")
 
 
 # ---------- Helpers ----------
-def _to_int(value: Any, default: int = 0) -> int:
-    try:
-        return int(value)
-    except (TypeError, ValueError):
-        return default
-
-
 def _parse_pagination() -> Tuple[int, int]:
-    page = max(_to_int(request.args.get("page", 1), 1), 1)
-    page_size = max(min(_to_int(request.args.get("page_size", 10), 10), 100), 1)
+    page = max(to_int(request.args.get("page", 1), 1), 1)
+    page_size = max(min(to_int(request.args.get("page_size", 10), 10), 100), 1)
     return page, page_size
 
 
@@ -58,38 +57,57 @@ def _get_subject_or_404(subject_id: int) -> Subject:
     return subject
 
 
-def _question_to_dict(question: Question, detail: bool = False) -> Dict[str, Any]:
+def _question_to_dict(question: Question, detail: bool = False, fields: Optional[Tuple[str, ...]] = None) -> Dict[str, Any]:
+    if fields is not None:
+        return question.to_fields_dict(fields)
     return question.to_detail_dict() if detail else question.to_brief_dict()
 
 
 def _sync_options(question: Question, options_payload: Optional[List[Dict[str, Any]]]) -> None:
+    """按 option_key 与已有选项比对，只新增、修改、删除有差异的行。"""
     if options_payload is None:
         return
-    cleaned: List[QuestionOption] = []
-    for item in options_payload:
-        option_key = (item.get("option_key") or "").strip()
-        option_text = (item.get("option_text") or "").strip()
-        if not option_key or not option_text:
+    existing: Dict[str, List[QuestionOption]] = {}
+    for option in question.options:
+        existing.setdefault(option.option_key, []).append(option)
+
+    synced: List[QuestionOption] = []
+    changed = False
+    for values in question_io.clean_options(options_payload):
+        matches = existing.get(values["option_key"])
+        if not matches:
+            synced.append(QuestionOption(**values))
+            changed = True
             continue
-        cleaned.append(
-            QuestionOption(
-                option_key=option_key,
-                option_text=option_text,
-                is_correct=bool(item.get("is_correct")),
-                sort_order=int(item.get("sort_order") or 0),
-            )
-        )
-    question.options = cleaned
+        option = matches.pop(0)
+        for field, value in values.items():
+            if getattr(option, field) != value:
+                setattr(option, field, value)
+                changed = True
+        synced.append(option)
+    # 没有被保留的旧选项由 delete-orphan 级联删除
+    changed = changed or any(existing.values())
+    question.options = synced
+    if changed:
+        _touch(question)
 
 
 def _sync_tags(question: Question, tag_names: Optional[List[str]]) -> None:
+    """按标签名与已有关联比对，未变化的关联原样保留，只为新标签查询/创建字典项。"""
     if tag_names is None:
         return
-    question.tags = [
-        QuestionTag(name=tag.strip())
-        for tag in tag_names
-        if tag and tag.strip()
-    ]
+    names = tags_service.clean_tag_names(tag_names)
+    existing = {link.name: link for link in question.tags}
+    tags = tags_service.resolve_tags(question.user_id, [name for name in names if name not in existing])
+    question.tags = [existing.get(name) or QuestionTag(name=name, tag=tags[name]) for name in names]
+    if set(names) != set(existing):
+        _touch(question)
+
+
+def _touch(question: Question) -> None:
+    """选项/标签变化时同步更新错题的 updated_at，详情 ETag 随之变化。"""
+    if question.id is not None:
+        question.updated_at = datetime.utcnow()
 
 
 def _sync_images(question: Question, image_urls: Optional[List[str]], field: str = "images") -> None:
@@ -102,12 +120,10 @@ def _sync_images(question: Question, image_urls: Optional[List[str]], field: str
     """
     if image_urls is None:
         return
-    # 过滤空值并验证URL格式
-    valid_urls = [url.strip() for url in image_urls if url and url.strip()]
-    if valid_urls:
-        setattr(question, field, json.dumps(valid_urls))
-    else:
-        setattr(question, field, None)
+    # 过滤空值，没有图片时置空；内容相同时不赋值，避免无变化的 UPDATE
+    urls = question_io.clean_image_urls(image_urls)
+    if getattr(question, field) != urls:
+        setattr(question, field, urls)
 
 
 def _allowed_file(filename: str) -> bool:
@@ -115,90 +131,299 @@ def _allowed_file(filename: str) -> bool:
     return "." in filename and filename.rsplit(".", 1)[1].lower() in Config.ALLOWED_EXTENSIONS
 
 
-# ---------- Question APIs ----------
-@questions_bp.route("/questions", methods=["GET"])
-def list_questions():
-    """分页获取错题列表，支持关键词、科目、难度等筛选。"""
-    page, page_size = _parse_pagination()
-    query = Question.query.filter_by(user_id=g.current_user.id, is_deleted=False)
+def _filter_keyword(query, keyword: str, ranked: bool = False):
+    """关键词过滤：优先使用全文索引（标题、内容、答案、错因、标签），否则退回 LIKE。
 
-    keyword = request.args.get("keyword")
-    if keyword:
-        like_keyword = f"%{keyword.strip()}%"
-        query = query.filter(
-            or_(
-                Question.title.ilike(like_keyword),
-                Question.content.ilike(like_keyword),
-            )
+    ranked 为 True 且走全文索引时按相关度排序。
+    """
+    if search.is_available(db.session.connection()):
+        matches = search.match_subquery(keyword, g.current_user.id)
+        if matches is not None:
+            query = query.join(matches, matches.c.question_id == Question.id)
+            return query.order_by(matches.c.rank) if ranked else query
+
+    like_keyword = f"%{keyword}%"
+    return query.filter(
+        or_(
+            Question.title.ilike(like_keyword),
+            Question.content.ilike(like_keyword),
         )
+    )
 
-    subject_id = _to_int(request.args.get("subject_id"))
+
+def _filter_questions(query, ranked: bool = False, params: Optional[Dict[str, Any]] = None):
+    """按请求参数（关键词、科目、标签、难度、题型、复习状态、是否有图片、日期范围）过滤错题。
+
+    params 默认取查询字符串，批量修改接口传入请求体中的 filter。
+    """
+    params = request.args if params is None else params
+    keyword = (params.get("keyword") or "").strip()
+    if keyword:
+        query = _filter_keyword(query, keyword, ranked=ranked)
+
+    subject_id = to_int(params.get("subject_id"))
     if subject_id:
         query = query.filter(Question.subject_id == subject_id)
 
-    difficulty = _to_int(request.args.get("difficulty"))
+    tag = (params.get("tag") or "").strip()
+    if tag:
+        query = tags_service.filter_by_tag(query, g.current_user.id, tag)
+
+    difficulty = to_int(params.get("difficulty"))
     if difficulty:
         query = query.filter(Question.difficulty == difficulty)
 
-    question_type = request.args.get("question_type")
+    question_type = params.get("question_type")
     if question_type:
         query = query.filter(Question.question_type == question_type)
 
-    review_status = request.args.get("review_status")
+    review_status = params.get("review_status")
     if review_status not in (None, ""):
-        status_val = _to_int(review_status, -1)
+        status_val = to_int(review_status, -1)
         if status_val in (0, 1):
             query = query.filter(Question.review_status == status_val)
 
-    start_date = _parse_datetime(request.args.get("start_date"))
+    has_images = params.get("has_images")
+    if has_images in ("0", "1"):
+        # 在 SQLite 中用 json_array_length 判断，不需要把行加载出来解析
+        image_count = func.coalesce(func.json_array_length(Question.images), 0)
+        query = query.filter(image_count > 0 if has_images == "1" else image_count == 0)
+
+    start_date = _parse_datetime(params.get("start_date"))
     if start_date:
         query = query.filter(Question.created_at >= start_date)
 
-    end_date = _parse_datetime(request.args.get("end_date"))
+    end_date = _parse_datetime(params.get("end_date"))
     if end_date:
         query = query.filter(Question.created_at <= end_date)
 
-    total = query.count()
+    return query
+
+
+def _subjects_version():
+    """当前用户科目的最大 updated_at。列表行带有科目名称和颜色，科目修改后列表 ETag 也要变化。"""
+    return select(func.max(Subject.updated_at)).where(Subject.user_id == g.current_user.id).scalar_subquery()
+
+
+def _list_version(query) -> Tuple[int, Optional[datetime], Optional[datetime]]:
+    """列表的版本信息：筛选结果的总数、最大 updated_at 与科目的最大 updated_at，一条聚合查询。"""
+    total, last_updated, subjects_updated = query.with_entities(
+        func.count(Question.id), func.max(Question.updated_at), _subjects_version()
+    ).order_by(None).one()
+    return total, last_updated, subjects_updated
+
+
+def _list_etag(*version) -> str:
+    return make_etag("questions", g.current_user.id, *version, request_signature())
+
+
+def _detail_version(question_id: int):
+    """详情的版本信息：错题与科目的 updated_at，以及选项、标签的行数和最大 id。
+
+    只查索引和一行错题数据，用于在加载选项/标签之前判断是否需要返回 304。
+    """
+    options = QuestionOption.__table__
+    tags = QuestionTag.__table__
+
+    def child_stats(table, aggregate):
+        return select(aggregate).where(table.c.question_id == Question.id).scalar_subquery()
+
+    return db.session.execute(
+        select(
+            Question.updated_at,
+            Subject.updated_at,
+            child_stats(options, func.count()),
+            child_stats(options, func.max(options.c.id)),
+            child_stats(tags, func.count()),
+            child_stats(tags, func.max(tags.c.id)),
+        )
+        .outerjoin(Subject, Subject.id == Question.subject_id)
+        .where(
+            Question.id == question_id,
+            Question.user_id == g.current_user.id,
+            Question.is_deleted.is_(False),
+        )
+    ).first()
+
+
+def _encode_cursor(question: Question) -> str:
+    raw = json.dumps([question.created_at.isoformat(), question.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(value: str) -> Tuple[datetime, int]:
+    """解析 next_cursor，格式不正确时抛出 ValueError。"""
+    try:
+        padded = value + "=" * (-len(value) % 4)
+        created_at, question_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(question_id)
+    except (TypeError, ValueError, UnicodeError, binascii.Error) as exc:
+        raise ValueError("cursor 参数无效") from exc
+
+
+def _list_questions_by_cursor(query, page_size: int, fields: Optional[Tuple[str, ...]] = None):
+    """游标分页：按 (created_at, id) 倒序定位，不使用 OFFSET，深翻页成本恒定。
+
+    ETag 由本页取出的行（id 与最大 updated_at）和科目版本计算，不对整个筛选结果做聚合；
+    总数仅在 with_total=1 时计算。
+    """
+    cursor = request.args.get("cursor")
+    total = None
+    if request.args.get("with_total") in ("1", "true"):
+        total = query.with_entities(func.count(Question.id)).order_by(None).scalar()
+    if cursor:
+        try:
+            created_at, last_id = _decode_cursor(cursor)
+        except ValueError as exc:
+            return Response.bad_request(str(exc))
+        query = query.filter(
+            or_(
+                Question.created_at < created_at,
+                and_(Question.created_at == created_at, Question.id < last_id),
+            )
+        )
+
     items = (
-        query.order_by(Question.created_at.desc())
+        query.options(*Question.load_options("brief", fields))
+        .order_by(Question.created_at.desc(), Question.id.desc())
+        .limit(page_size + 1)
+        .all()
+    )
+    # 本页的 page_size + 1 行决定了返回内容和 has_more，命中时省去序列化和传输
+    etag = _list_etag(
+        total,
+        ",".join(str(item.id) for item in items),
+        max((item.updated_at for item in items if item.updated_at), default=None),
+        db.session.execute(select(_subjects_version())).scalar(),
+    )
+    cached = not_modified(etag, weak=True)
+    if cached is not None:
+        return cached
+    has_more = len(items) > page_size
+    items = items[:page_size]
+
+    data = {
+        "list": [_question_to_dict(item, fields=fields) for item in items],
+        "page_size": page_size,
+        "has_more": has_more,
+        "next_cursor": _encode_cursor(items[-1]) if has_more else None,
+    }
+    if total is not None:
+        data["total"] = total
+    return with_etag(Response.success(data), etag, weak=True)
+
+
+# ---------- Question APIs ----------
+@questions_bp.route("/questions", methods=["GET"])
+def list_questions():
+    """分页获取错题列表，支持关键词、科目、难度等筛选。
+
+    传入 cursor 参数（首页传空字符串）时改用游标分页，返回 next_cursor/has_more，
+    总数仅在 with_total=1 时计算。sort=relevance 时关键词结果按相关度排序。
+    fields=id,title,... 只查询并返回指定字段。
+    """
+    page, page_size = _parse_pagination()
+    try:
+        fields = Question.parse_fields(request.args.get("fields"), "brief")
+    except ValueError as exc:
+        return Response.bad_request(str(exc))
+    base_query = Question.query.filter_by(user_id=g.current_user.id, is_deleted=False)
+    if "cursor" in request.args:
+        return _list_questions_by_cursor(_filter_questions(base_query), page_size, fields)
+
+    query = _filter_questions(base_query, ranked=request.args.get("sort") == "relevance")
+
+    # 先用一条聚合查询得到总数和版本，客户端缓存有效时不再加载和序列化
+    version = _list_version(query)
+    etag = _list_etag(*version)
+    cached = not_modified(etag, weak=True)
+    if cached is not None:
+        return cached
+    total = version[0]
+    items = (
+        query.options(*Question.load_options("brief", fields))
+        .order_by(Question.created_at.desc(), Question.id.desc())
         .offset((page - 1) * page_size)
         .limit(page_size)
         .all()
     )
 
     data = {
-        "list": [_question_to_dict(item) for item in items],
+        "list": [_question_to_dict(item, fields=fields) for item in items],
         "total": total,
         "page": page,
         "page_size": page_size,
     }
+    return with_etag(Response.success(data), etag, weak=True)
+
+
+@questions_bp.route("/questions/changes", methods=["GET"])
+def list_question_changes():
+    """增量同步：返回 since 之后新增、修改或删除的错题。
+
+    since 为上次返回的 next_since（首次同步不传），每次最多返回 page_size 条，
+    has_more 为 true 时用 next_since 继续拉取。deleted 为已删除错题的 id（墓碑）。
+    reset 为 true 表示 since 已失效，客户端需要清空本地数据后从头同步。
+    fields=... 时 changes 中只返回指定字段。
+    """
+    try:
+        since = changes.parse_token(request.args.get("since"))
+        fields = Question.parse_fields(request.args.get("fields"), "detail")
+    except ValueError as exc:
+        return Response.bad_request(str(exc))
+    page_size = max(min(to_int(request.args.get("page_size", 200), 200), 1000), 1)
+    data = changes.fetch_changes(g.current_user.id, since, page_size, fields)
+    return Response.success(data)
+
+
+@questions_bp.route("/questions/duplicates", methods=["GET"])
+def list_duplicate_questions():
+    """列出当前用户近似重复的错题簇（标题+内容 MinHash 相似度不低于阈值，经 LSH 分段索引查找），按簇大小排序。"""
+    limit = max(min(to_int(request.args.get("limit", 50), 50), 200), 1)
+    clusters = duplicates.find_clusters(g.current_user.id)
+    shown = clusters[:limit]
+    ids = [qid for cluster in shown for qid in cluster]
+    titles = dict(
+        db.session.execute(select(Question.id, Question.title).where(Question.id.in_(ids))).all()
+    ) if ids else {}
+    data = {
+        "clusters": [[{"id": qid, "title": titles.get(qid)} for qid in cluster] for cluster in shown],
+        "total": len(clusters),
+    }
     return Response.success(data)
 
 
 @questions_bp.route("/questions/<int:question_id>", methods=["GET"])
 def get_question_detail(question_id: int):
-    """获取单个错题的完整详情。"""
-    question = Question.query.filter_by(
+    """获取单个错题的完整详情，fields=... 时只返回指定字段。"""
+    try:
+        fields = Question.parse_fields(request.args.get("fields"), "detail")
+    except ValueError as exc:
+        return Response.bad_request(str(exc))
+    version = _detail_version(question_id)
+    if version is None:
+        return Response.not_found("错题不存在或已删除")
+    etag = make_etag("question", question_id, *version, fields)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    question = Question.query.options(*Question.load_options("detail", fields)).filter_by(
         id=question_id,
         user_id=g.current_user.id,
         is_deleted=False,
     ).first()
     if not question:
         return Response.not_found("错题不存在或已删除")
-    return Response.success(_question_to_dict(question, detail=True))
+    return with_etag(Response.success(_question_to_dict(question, detail=True, fields=fields)), etag)
 
 
 @questions_bp.route("/questions", methods=["POST"])
 def create_question():
-    """创建新错题记录。"""
+    """创建新错题记录，duplicates 中返回疑似重复的已有错题及相似度。"""
     payload = request.get_json(silent=True) or {}
-    required_fields = ["title", "question_type", "difficulty"]
-    missing = [field for field in required_fields if not payload.get(field)]
     # content/answer: 有对应图片时文字可以为空；error_reason完全可选
-    if not payload.get("content") and not payload.get("images"):
-        missing.append("content")
-    if not payload.get("answer") and not payload.get("answer_images"):
-        missing.append("answer")
+    missing = question_io.missing_fields(payload)
     if missing:
         return Response.error(f"缺少必要参数：{', '.join(missing)}")
 
@@ -206,7 +431,7 @@ def create_question():
     subject_id = None
     if payload.get("subject_id"):
         try:
-            subject = _get_subject_or_404(_to_int(payload.get("subject_id")))
+            subject = _get_subject_or_404(to_int(payload.get("subject_id")))
             subject_id = subject.id
         except ValueError as exc:
             return Response.not_found(str(exc))
@@ -219,7 +444,7 @@ def create_question():
         content=payload.get("content"),
         answer=payload.get("answer"),
         error_reason=payload.get("error_reason"),
-        difficulty=_to_int(payload.get("difficulty"), 2),
+        difficulty=to_int(payload.get("difficulty"), 2),
         review_status=int(payload.get("review_status", 0)),
         is_important=bool(payload.get("is_important", False)),
         is_mastered=bool(payload.get("is_mastered", False)),
@@ -232,14 +457,20 @@ def create_question():
     _sync_images(question, payload.get("answer_images"), field="answer_images")
 
     db.session.add(question)
+    # flush 时监听已写入签名：在同一事务内序列化并查找重复，提交后不必重新加载错题和关联
+    db.session.flush()
+    data = _question_to_dict(question, detail=True)
+    data["duplicates"] = duplicates.find_similar(
+        g.current_user.id, question.title, question.content, exclude_id=question.id
+    )
     db.session.commit()
-    return Response.success(_question_to_dict(question, detail=True), "错题创建成功")
+    return Response.success(data, "错题创建成功")
 
 
 @questions_bp.route("/questions/<int:question_id>", methods=["PUT"])
 def update_question(question_id: int):
     """更新指定错题的内容。"""
-    question = Question.query.filter_by(
+    question = Question.query.options(*Question.load_options("detail")).filter_by(
         id=question_id,
         user_id=g.current_user.id,
         is_deleted=False,
@@ -252,7 +483,7 @@ def update_question(question_id: int):
     if "subject_id" in payload:
         if payload["subject_id"]:
             try:
-                subject = _get_subject_or_404(_to_int(payload.get("subject_id")))
+                subject = _get_subject_or_404(to_int(payload.get("subject_id")))
                 question.subject_id = subject.id
             except ValueError as exc:
                 return Response.not_found(str(exc))
@@ -264,9 +495,9 @@ def update_question(question_id: int):
             setattr(question, field, payload[field])
 
     if "difficulty" in payload:
-        question.difficulty = _to_int(payload.get("difficulty"), question.difficulty)
+        question.difficulty = to_int(payload.get("difficulty"), question.difficulty)
     if "review_status" in payload:
-        question.review_status = _to_int(payload.get("review_status"), question.review_status)
+        question.review_status = to_int(payload.get("review_status"), question.review_status)
     if "is_important" in payload:
         question.is_important = bool(payload.get("is_important"))
     if "is_mastered" in payload:
@@ -302,6 +533,137 @@ def delete_question(question_id: int):
     return Response.success(message="错题已删除")
 
 
+def _bulk_values(action: str, changes: Any) -> Dict[str, Any]:
+    """把批量操作转换为 UPDATE 的字段值，参数不合法时抛出 ValueError。"""
+    if action == "delete":
+        return {"is_deleted": True}
+    if action == "reset_review":
+        return {
+            "review_status": 0,
+            "review_count": 0,
+            "last_review_at": None,
+            "next_review_at": datetime.utcnow(),
+            "review_state": None,
+            "mastery_status": None,
+        }
+    if action != "update":
+        raise ValueError("action 只支持 update、delete、reset_review")
+    if not isinstance(changes, dict):
+        raise ValueError("changes 必须是对象")
+
+    values: Dict[str, Any] = {}
+    for field in ("is_important", "is_mastered"):
+        if field in changes:
+            values[field] = bool(changes[field])
+    if "difficulty" in changes:
+        values["difficulty"] = to_int(changes["difficulty"])
+        if values["difficulty"] not in (1, 2, 3):
+            raise ValueError("difficulty 只能是 1、2、3")
+    if "review_status" in changes:
+        values["review_status"] = to_int(changes["review_status"], -1)
+        if values["review_status"] not in (0, 1):
+            raise ValueError("review_status 只能是 0 或 1")
+    if "subject_id" in changes:
+        values["subject_id"] = _get_subject_or_404(to_int(changes["subject_id"])).id if changes["subject_id"] else None
+    if not values:
+        raise ValueError("changes 中没有可修改的字段")
+    return values
+
+
+@questions_bp.route("/questions/batch", methods=["POST"])
+def batch_update_questions():
+    """批量修改错题，一个事务内执行一条 UPDATE，返回影响的错题数。
+
+    请求体用 ids（最多 BULK_MAX_IDS 个）或 filter（与列表接口相同的筛选参数）选择错题，
+    action 为 update（配合 changes）、delete（软删除）或 reset_review（重置复习进度）。
+    """
+    payload = request.get_json(silent=True) or {}
+    try:
+        values = _bulk_values(payload.get("action", "update"), payload.get("changes"))
+    except ValueError as exc:
+        return Response.bad_request(str(exc))
+
+    target = db.session.query(Question.id).filter(
+        Question.user_id == g.current_user.id,
+        Question.is_deleted.is_(False),
+    )
+    if "ids" in payload:
+        ids = payload["ids"]
+        if not isinstance(ids, list) or not ids or not all(isinstance(qid, int) for qid in ids):
+            return Response.bad_request("ids 必须是非空的整数数组")
+        if len(ids) > Config.BULK_MAX_IDS:
+            return Response.bad_request(f"ids 一次最多 {Config.BULK_MAX_IDS} 个，更多请使用 filter")
+        target = target.filter(Question.id.in_(ids))
+    elif isinstance(payload.get("filter"), dict):
+        params = {key: str(value) for key, value in payload["filter"].items() if value is not None}
+        target = _filter_questions(target, params=params)
+    else:
+        return Response.bad_request("请提供 ids 或 filter")
+
+    affected_ids = db.session.execute(
+        update(Question)
+        .where(Question.id.in_(target.statement))
+        .values(**values)
+        .returning(Question.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    if affected_ids and "is_deleted" in values:
+        # 批量 UPDATE 不经过 flush 监听，手动同步标签计数与全文索引
+        conn = db.session.connection()
+        tags_service.refresh_counts(
+            conn,
+            db.session.scalars(
+                db.select(QuestionTag.tag_id).where(QuestionTag.question_id.in_(affected_ids)).distinct()
+            ),
+        )
+        if search.is_available(conn):
+            search.reindex_questions(conn, affected_ids)
+    db.session.commit()
+    return Response.success({"affected": len(affected_ids)}, f"已更新 {len(affected_ids)} 道错题")
+
+
+@questions_bp.route("/questions/import", methods=["POST"])
+def import_questions():
+    """批量导入错题（NDJSON / CSV）。
+
+    multipart 上传 file 字段，或直接把文件内容作为请求体（Content-Type 为
+    application/x-ndjson 或 text/csv），也可以用 ?format= 指定格式。
+    逐行解析、分批写入，返回成功/失败条数和失败行的原因。
+    """
+    upload = request.files.get("file")
+    if upload is not None:
+        stream, filename, content_type = upload.stream, upload.filename, upload.mimetype
+    else:
+        stream, filename, content_type = request.stream, None, request.mimetype
+    fmt = question_io.detect_format(request.args.get("format"), filename, content_type)
+    if fmt is None:
+        return Response.bad_request("无法识别导入格式，请使用 ndjson 或 csv")
+
+    batch_size = to_int(request.args.get("batch_size"), 0) or None
+    result = question_io.import_questions(g.current_user.id, stream, fmt, batch_size=batch_size)
+    return Response.success(
+        result.to_dict(),
+        f"导入完成：成功 {result.imported} 条，失败 {result.failed} 条",
+    )
+
+
+@questions_bp.route("/questions/export", methods=["GET"])
+def export_questions():
+    """流式导出当前用户的错题本，format 为 ndjson（默认）、csv 或 zip（附带上传文件）。"""
+    fmt = (request.args.get("format") or "ndjson").lower()
+    if fmt not in question_io.EXPORT_FORMATS:
+        return Response.bad_request("导出格式只支持 ndjson、csv、zip")
+    filename = f"questions-{datetime.now().strftime('%Y%m%d%H%M%S')}.{fmt}"
+    return FlaskResponse(
+        stream_with_context(question_io.export_questions(g.current_user.id, fmt)),
+        mimetype=question_io.EXPORT_MIMETYPES[fmt],
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
 # ---------- Image Upload APIs (已迁移到通用上传接口) ----------
 # 保留此路由用于向后兼容，调用通用上传逻辑
 @questions_bp.route("/questions/upload-image", methods=["POST"])
@@ -1,57 +1,42 @@
 """复习中心相关接口：统计、抽题、提交结果。"""
-from datetime import datetime, timedelta
-from typing import Any
+from datetime import datetime
 
 from flask import Blueprint, g, request
-from sqlalchemy import func
 
 from app.models import db, Question
+from app.models.question import REVIEW_FIELDS
+from app.services import review_log, sampling, scheduler
+from app.services import tags as tags_service
+from app.utils.params import to_int
 from app.utils.response import Response
 
 reviews_bp = Blueprint("reviews", __name__, url_prefix="/api/review")
 
 
-def _to_int(value: Any, default: int = 0) -> int:
-    try:
-        return int(value)
-    except (TypeError, ValueError):
-        return default
-
-
 @reviews_bp.route("/stats", methods=["GET"])
 def review_stats():
-    """返回复习统计数据：今日复习、待复习、已复习、连续天数。"""
-    today = datetime.utcnow().date()
+    """返回复习统计数据：今日复习、待复习、已复习、当前到期、连续天数。"""
+    now = datetime.utcnow()
+    today = now.date()
     user_id = g.current_user.id
 
     base_query = Question.query.filter_by(user_id=user_id, is_deleted=False)
 
     pending_count = base_query.filter(Question.review_status == 0).count()
     reviewed_count = base_query.filter(Question.review_status == 1).count()
+    due_count = base_query.filter(Question.next_review_at <= now).count()
 
-    today_start = datetime.combine(today, datetime.min.time())
-    today_next = today_start + timedelta(days=1)
-    today_count = (
-        base_query.filter(
-            Question.last_review_at >= today_start,
-            Question.last_review_at < today_next,
-        ).count()
-    )
+    # 今日复习过的不同错题数，来自复习事件日志
+    today_count = review_log.reviewed_count(user_id, today, today)
 
-    reviewed_dates = {
-        q.last_review_at.date()
-        for q in base_query.filter(Question.last_review_at.isnot(None)).all()
-    }
-    streak_days = 0
-    cursor = today
-    while cursor in reviewed_dates:
-        streak_days += 1
-        cursor -= timedelta(days=1)
+    # 连续天数只读取复习事件中最近的日期，与错题数量无关
+    streak_days = review_log.streak_days(user_id, today)
 
     data = {
         "today_count": today_count,
         "pending_count": pending_count,
         "reviewed_count": reviewed_count,
+        "due_count": due_count,
         "streak_days": streak_days,
     }
     return Response.success(data)
@@ -59,19 +44,35 @@ def review_stats():
 
 @reviews_bp.route("/list", methods=["GET"])
 def review_list():
-    """根据复习模式返回待复习题目列表，支持分页。"""
+    """根据复习模式返回待复习题目列表，支持分页。
+
+    mode=due 返回已到复习时间的错题（按到期时间从早到晚），是 next_review_at 索引上的范围扫描。
+    mode=random 随机抽取（见 services/sampling.py），传入 seed 可复现，翻页时沿用响应中的 seed。
+    """
     user_id = g.current_user.id
+    try:
+        fields = Question.parse_fields(request.args.get("fields"), "review")
+    except ValueError as exc:
+        return Response.bad_request(str(exc))
     mode = request.args.get("mode", "pending")
-    subject_id = _to_int(request.args.get("subject_id"))
-    difficulty = _to_int(request.args.get("difficulty"))
+    seed = None
+    if mode == "random":
+        try:
+            seed = sampling.parse_seed(request.args.get("seed"))
+        except ValueError as exc:
+            return Response.bad_request(str(exc))
+        if seed is None:
+            seed = sampling.new_seed()
+    subject_id = to_int(request.args.get("subject_id"))
+    difficulty = to_int(request.args.get("difficulty"))
     
     # 解析分页参数
-    page = max(_to_int(request.args.get("page", 1), 1), 1)
-    page_size = max(min(_to_int(request.args.get("page_size", 10), 10), 100), 1)
+    page = max(to_int(request.args.get("page", 1), 1), 1)
+    page_size = max(min(to_int(request.args.get("page_size", 10), 10), 100), 1)
     limit = request.args.get("limit")  # 兼容旧版 limit 参数
     if limit:
         # 如果有 limit 参数，使用 limit（用于复习模式的随机抽题）
-        limit = max(1, min(_to_int(limit, 20), 100))
+        limit = max(1, min(to_int(limit, 20), 100))
         offset = 0
     else:
         # 使用分页参数
@@ -82,6 +83,8 @@ def review_list():
 
     if mode == "important":
         query = query.filter(Question.is_important.is_(True))
+    elif mode == "due":
+        query = query.filter(Question.next_review_at <= datetime.utcnow())
     else:
         query = query.filter(Question.review_status == 0)
 
@@ -89,47 +92,43 @@ def review_list():
         query = query.filter(Question.subject_id == subject_id)
     if difficulty:
         query = query.filter(Question.difficulty == difficulty)
+    tag = (request.args.get("tag") or "").strip()
+    if tag:
+        query = tags_service.filter_by_tag(query, user_id, tag)
 
-    # 获取总数（仅在使用分页时计算）
-    total = None
-    if not request.args.get("limit"):
-        total = query.count()
-
+    paginated = not request.args.get("limit")
+    load_options = Question.load_options("review", fields)
     if mode == "random":
-        query = query.order_by(func.random())
-    elif mode == "difficulty":
-        query = query.order_by(Question.difficulty.asc(), Question.created_at.desc())
+        # 只读取候选 id 后抽样，候选数即总数，不需要再单独 COUNT
+        ids = sampling.candidate_ids(query, user_id)
+        total = len(ids) if paginated else None
+        picked = sampling.pick(ids, offset + limit, seed)[offset:]
+        results = sampling.load_in_order(query, picked, load_options)
     else:
-        query = query.order_by(Question.created_at.desc())
-
-    results = query.offset(offset).limit(limit).all()
-    data = [
-        {
-            "id": item.id,
-            "title": item.title,
-            "content": item.content,
-            "answer": item.answer,
-            "error_reason": item.error_reason,
-            "difficulty": item.difficulty,
-            "review_count": item.review_count,
-            "last_review_at": item.last_review_at.strftime("%Y-%m-%d %H:%M:%S")
-            if item.last_review_at
-            else None,
-            "subject_id": item.subject_id,
-            "subject_name": item.subject.name if item.subject else None,
-            "mastery_status": item.mastery_status,
-        }
-        for item in results
-    ]
+        # 获取总数（仅在使用分页时计算）
+        total = query.count() if paginated else None
+
+        if mode == "difficulty":
+            query = query.order_by(Question.difficulty.asc(), Question.created_at.desc())
+        elif mode == "due":
+            query = query.order_by(Question.next_review_at.asc(), Question.id.asc())
+        else:
+            query = query.order_by(Question.created_at.desc())
+
+        results = query.options(*load_options).offset(offset).limit(limit).all()
+    data = [item.to_fields_dict(fields or REVIEW_FIELDS) for item in results]
     
     # 如果使用分页，返回分页信息
     if total is not None:
-        return Response.success({
+        page_data = {
             "list": data,
             "total": total,
             "page": page,
             "page_size": page_size
-        })
+        }
+        if seed is not None:
+            page_data["seed"] = seed
+        return Response.success(page_data)
     return Response.success(data)
 
 
@@ -149,7 +148,13 @@ def submit_review(question_id: int):
     if result not in {"forgot", "hard", "mastered"}:
         return Response.error("复习结果不合法")
 
+    duration_ms = payload.get("duration_ms")
+    duration_ms = max(to_int(duration_ms), 0) if duration_ms is not None else None
+
     now = datetime.utcnow()
+    # 先按上次复习时间计算新的间隔并写入事件日志，再更新复习记录
+    interval = scheduler.schedule_review(question, result, now)
+    review_log.record_review(question, result, now, interval, duration_ms)
     question.review_count += 1
     question.last_review_at = now
     
@@ -160,12 +165,10 @@ def submit_review(question_id: int):
         question.review_status = 1
         question.is_mastered = True
         question.is_important = False
-        question.next_review_at = None
     else:
         question.review_status = 0
         question.is_mastered = False
         question.is_important = result == "hard" or question.is_important
-        question.next_review_at = now + timedelta(days=1)
 
     db.session.commit()
     return Response.success(
@@ -174,7 +177,19 @@ def submit_review(question_id: int):
             "last_review_at": question.last_review_at.strftime("%Y-%m-%d %H:%M:%S"),
             "review_status": question.review_status,
             "mastery_status": question.mastery_status,
+            "next_review_at": question.next_review_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "interval_days": interval,
         },
         "复习结果已记录",
     )
 
+
+@reviews_bp.route("/<int:question_id>/events", methods=["GET"])
+def review_events(question_id: int):
+    """返回单题的复习历史（按时间从新到旧），包括已软删除的错题。"""
+    question = Question.query.filter_by(id=question_id, user_id=g.current_user.id).first()
+    if not question:
+        return Response.not_found("错题不存在")
+    limit = max(min(to_int(request.args.get("limit", 50), 50), 200), 1)
+    events = review_log.question_history(question_id, limit)
+    return Response.success([item.to_dict() for item in events])
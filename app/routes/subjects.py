@@ -1,21 +1,14 @@
 """科目管理接口：提供科目列表及增删改。"""
-from typing import Any
 
 from flask import Blueprint, g, request
 
 from app.models import db, Subject
+from app.utils.params import to_int
 from app.utils.response import Response
 
 subjects_bp = Blueprint("subjects", __name__, url_prefix="/api/subjects")
 
 
-def _to_int(value: Any, default: int = 0) -> int:
-    try:
-        return int(value)
-    except (TypeError, ValueError):
-        return default
-
-
 def _get_subject_or_404(subject_id: int) -> Subject:
     subject = Subject.query.filter_by(
         id=subject_id,
@@ -51,7 +44,7 @@ def create_subject():
         name=name,
         color=(payload.get("color") or "#4299e1").strip() or "#4299e1",
         icon=(payload.get("icon") or "fas fa-book").strip() or "fas fa-book",
-        sort_order=_to_int(payload.get("sort_order"), 0),
+        sort_order=to_int(payload.get("sort_order"), 0),
     )
     db.session.add(subject)
     db.session.commit()
@@ -79,7 +72,7 @@ def update_subject(subject_id: int):
         icon = (payload.get("icon") or subject.icon).strip()
         subject.icon = icon or subject.icon
     if "sort_order" in payload:
-        subject.sort_order = _to_int(payload.get("sort_order"), subject.sort_order)
+        subject.sort_order = to_int(payload.get("sort_order"), subject.sort_order)
 
     db.session.commit()
     return Response.success(subject.to_dict(), "科目更新成功")
@@ -0,0 +1,22 @@
+"""标签接口：当前用户的标签及各标签错题数。"""
+
+from flask import Blueprint, g, request
+
+from app.models import Tag
+from app.utils.params import to_int
+from app.utils.response import Response
+
+tags_bp = Blueprint("tags", __name__, url_prefix="/api/tags")
+
+
+@tags_bp.route("", methods=["GET"])
+def list_tags():
+    """按错题数从多到少返回标签，计数来自 tags.question_count，不扫描错题。"""
+    limit = max(min(to_int(request.args.get("limit", 100), 100), 500), 1)
+    tags = (
+        Tag.query.filter(Tag.user_id == g.current_user.id, Tag.question_count > 0)
+        .order_by(Tag.question_count.desc(), Tag.name.asc())
+        .limit(limit)
+        .all()
+    )
+    return Response.success([tag.to_dict() for tag in tags])
@@ -2,6 +2,18 @@
 
 __all__ = [
     "llm_client",
+    "token_cache",
+    "current_user",
+    "password_hasher",
+    "search",
+    "tags",
+    "question_io",
+    "changes",
+    "purge",
+    "duplicates",
+    "scheduler",
+    "review_log",
+    "sampling",
 ]
 
 
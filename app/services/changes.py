@@ -0,0 +1,141 @@
+"""错题增量同步：变更序号（change_seq）的分配与按序号读取变更。
+
+questions 上的触发器在每次 INSERT/UPDATE 之后，从 sync_state 中取下一个序号写入
+该行的 change_seq。SQLite 同一时刻只有一个写事务，序号在写锁内分配、随事务一起提交，
+所以序号顺序与提交顺序一致：客户端记住已经读到的最大序号，下次从它之后继续读，
+不会漏掉并发写入的变更。ORM、Core 批量写入和原生 SQL 都经过触发器，不需要各自维护。
+
+软删除也是一次 UPDATE，会得到新的序号，作为墓碑返回给客户端。
+硬删除的行不再出现在变更中，清理时把它们的最大序号记为 purged 水位，
+客户端的 since 落在水位之前时需要全量重新同步。
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import DDL, event, select
+from sqlalchemy.engine import Connection
+
+from ..models import db, Question, SyncState
+
+SEQUENCE = "questions"
+PURGED = "questions_purged"
+
+_NEXT_SEQ = (
+    f"INSERT OR IGNORE INTO sync_state (name, value) VALUES ('{SEQUENCE}', 0); "
+    f"UPDATE sync_state SET value = value + 1 WHERE name = '{SEQUENCE}'; "
+    "UPDATE questions SET change_seq = "
+    f"(SELECT value FROM sync_state WHERE name = '{SEQUENCE}') WHERE id = NEW.id;"
+)
+# 触发器内部对 change_seq 的更新不会再次分配序号（WHEN 条件 + SQLite 默认不递归触发）
+TRIGGERS = {
+    "trg_questions_change_seq_insert": f"AFTER INSERT ON questions BEGIN {_NEXT_SEQ} END",
+    "trg_questions_change_seq_update": (
+        "AFTER UPDATE ON questions WHEN NEW.change_seq IS OLD.change_seq "
+        f"BEGIN {_NEXT_SEQ} END"
+    ),
+}
+_TRIGGER_DDL = [
+    DDL(f"CREATE TRIGGER IF NOT EXISTS {name} {body}").execute_if(dialect="sqlite")
+    for name, body in TRIGGERS.items()
+]
+
+
+def create_triggers(conn: Connection) -> None:
+    """创建分配变更序号的触发器，已存在时跳过。"""
+    for name, body in TRIGGERS.items():
+        conn.exec_driver_sql(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def init_change_tracking() -> None:
+    """create_all 建 questions 表时一并创建触发器；已有数据库由迁移创建。"""
+    for ddl in _TRIGGER_DDL:
+        if not event.contains(Question.__table__, "after_create", ddl):
+            event.listen(Question.__table__, "after_create", ddl)
+
+
+def sequence_state(conn: Connection) -> Tuple[int, int]:
+    """返回 (当前最大序号, 已清理的最大序号)。"""
+    values = dict(
+        conn.execute(
+            select(SyncState.name, SyncState.value).where(SyncState.name.in_((SEQUENCE, PURGED)))
+        ).all()
+    )
+    return values.get(SEQUENCE, 0), values.get(PURGED, 0)
+
+
+def parse_token(value: Optional[str]) -> int:
+    """解析 since 参数：空值为 0（首次同步），格式不正确时抛出 ValueError。"""
+    if value in (None, ""):
+        return 0
+    try:
+        since = int(value)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("since 参数无效") from exc
+    if since < 0:
+        raise ValueError("since 参数无效")
+    return since
+
+
+def changes_statement(user_id: int, since: int, limit: int):
+    """since 之后的 (id, change_seq, is_deleted)，经 (user_id, change_seq) 索引按序读取。"""
+    stmt = (
+        select(Question.id, Question.change_seq, Question.is_deleted)
+        .where(Question.user_id == user_id, Question.change_seq > since)
+        .order_by(Question.change_seq)
+        .limit(limit)
+    )
+    if not since:
+        stmt = stmt.where(Question.is_deleted.is_(False))
+    return stmt
+
+
+def fetch_changes(
+    user_id: int,
+    since: int,
+    limit: int,
+    fields: Optional[Tuple[str, ...]] = None,
+) -> Dict[str, object]:
+    """读取 since 之后的一批变更，按 change_seq 升序。
+
+    先经 (user_id, change_seq) 索引取出本批的 id、序号和删除状态，
+    再按 id 加载未删除错题的详情，查询次数与批大小无关。
+    since 为 0 时是首次同步，只返回未删除的错题。
+    """
+    conn = db.session.connection()
+    current, purged = sequence_state(conn)
+    if since and (since < purged or since > current):
+        # token 早于清理水位或不属于当前数据库，增量无法保证完整
+        return {"reset": True, "changes": [], "deleted": [], "next_since": "0", "has_more": True}
+
+    rows = db.session.execute(changes_statement(user_id, since, limit + 1)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    live_ids = [row.id for row in rows if not row.is_deleted]
+    loaded = {}
+    if live_ids:
+        loaded = {
+            question.id: question
+            for question in Question.query.options(*Question.load_options("detail", fields))
+            .filter(Question.id.in_(live_ids))
+            .all()
+        }
+    changes: List[dict] = []
+    deleted: List[int] = []
+    for row in rows:
+        question = loaded.get(row.id)
+        if row.is_deleted or question is None:
+            deleted.append(row.id)
+        else:
+            item = question.to_fields_dict(fields) if fields is not None else question.to_detail_dict()
+            item["change_seq"] = row.change_seq
+            changes.append(item)
+    next_since = rows[-1].change_seq if rows else (since or current)
+    return {
+        "reset": False,
+        "changes": changes,
+        "deleted": deleted,
+        "next_since": str(next_since),
+        "has_more": has_more,
+    }
@@ -0,0 +1,55 @@
+"""请求级别的当前用户对象：只依赖 JWT 声明，需要时再加载 User。"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Optional
+
+from .token_cache import TokenPrincipal
+
+if TYPE_CHECKING:
+    from ..models import User
+
+
+class CurrentUser:
+    """
+    挂在 g.current_user 上的轻量身份对象。
+
+    大多数接口只需要 ``g.current_user.id``，直接取自 token 声明，不查库
+    （用户是否存在已在 token 首次校验、放入缓存之前确认过）；
+    访问 nickname、to_dict()、update_profile() 等资料字段时才按主键加载
+    User 行，并在本次请求内复用。
+    """
+
+    __slots__ = ("id", "principal", "_user", "_loaded")
+
+    def __init__(self, principal: TokenPrincipal):
+        self.id = principal.user_id
+        self.principal = principal
+        self._user = None
+        self._loaded = False
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def user(self) -> Optional["User"]:
+        """按需加载完整的 User ORM 对象。"""
+        if not self._loaded:
+            from ..models import db, User
+
+            self._user = db.session.get(User, self.id)
+            self._loaded = True
+        return self._user
+
+    def __getattr__(self, name: str) -> Any:
+        # 只有 __slots__ 之外的属性才会走到这里，统一转给 User
+        user = self.user
+        if user is None:
+            raise AttributeError(f"用户 {self.id} 不存在")
+        return getattr(user, name)
+
+    def __bool__(self) -> bool:
+        return True
+
+    def __repr__(self) -> str:
+        return f"<CurrentUser(id={self.id}, loaded={self._loaded})>"
@@ -0,0 +1,253 @@
+"""错题近似重复检测：标题+内容的 MinHash 签名与 LSH 分段索引。
+
+文本按全文检索相同的规则切分（汉字二元组 + 英文/数字单词）得到词元集合，计算 32 个
+MinHash 值作为签名，相同位置取值相同的比例即两段文本 Jaccard 相似度的估计。
+签名每 4 个值一段、共 8 段，每段摘要成 band_hash 写入 question_fingerprints：
+相似度 0.9 的两道错题至少一段相同的概率超过 99.9%，而不相关的文本几乎不会相同。
+
+查找时按 (user_id, band_hash) 索引定位 8 次，只读取真正可能重复的候选，
+耗时与错题总数无关；查找全部重复簇时按 band_hash 顺序扫描一遍索引，
+只比较同一分段内的错题，不做两两比较。
+
+签名与 questions 在同一事务中维护：session flush 后对新增或标题、内容变化的错题重新计算；
+批量导入等 Core 写入由调用方调用 fingerprint_questions。
+"""
+from __future__ import annotations
+
+import hashlib
+import struct
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import and_, event, inspect, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, aliased
+
+from ..config import Config
+from ..models import db, Question, QuestionFingerprint
+from .search import tokenize
+
+NUM_HASHES = 32
+BANDS = 8
+ROWS = NUM_HASHES // BANDS
+MIN_TOKENS = 3  # 词元太少的文本签名不稳定，不参与检测
+# 这些属性变化时需要重新计算签名
+FINGERPRINT_FIELDS = ("title", "content")
+
+_MASK32 = (1 << 32) - 1
+_STRUCT = struct.Struct(f">{NUM_HASHES}I")
+
+
+def _token_hash(token: str) -> int:
+    # 内置 hash() 每个进程随机化，签名需要持久化，这里使用稳定的摘要
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+# 词元摘要与固定掩码异或后取最小值，近似 NUM_HASHES 个独立的随机排列
+_MASKS = [_token_hash(f"minhash-{i}") for i in range(NUM_HASHES)]
+
+
+def signature(*texts: Optional[str]) -> Optional[bytes]:
+    """计算 MinHash 签名（NUM_HASHES 个 32 位值），有效词元不足 MIN_TOKENS 时返回 None。"""
+    hashes = {_token_hash(token) for text in texts for token in tokenize(text)}
+    if len(hashes) < MIN_TOKENS:
+        return None
+    values = [min(map(mask.__xor__, hashes)) & _MASK32 for mask in _MASKS]
+    return _STRUCT.pack(*values)
+
+
+def band_hashes(sig: bytes) -> List[int]:
+    """把签名按段摘要成 band_hash（有符号 64 位整数，段号参与摘要）。"""
+    size = ROWS * 4
+    return [
+        int.from_bytes(
+            hashlib.blake2b(bytes([band]) + sig[band * size:(band + 1) * size], digest_size=8).digest(),
+            "big",
+            signed=True,
+        )
+        for band in range(BANDS)
+    ]
+
+
+def similarity(a: bytes, b: bytes) -> float:
+    """签名中相同位置取值相同的比例，即 Jaccard 相似度的估计。"""
+    same = sum(x == y for x, y in zip(_STRUCT.unpack(a), _STRUCT.unpack(b)))
+    return round(same / NUM_HASHES, 4)
+
+
+def fingerprint_questions(conn: Connection, question_ids: Iterable[int]) -> None:
+    """按数据库中的最新数据重写指定错题的签名行。"""
+    table = QuestionFingerprint.__table__
+    ids = sorted({int(qid) for qid in question_ids if qid})
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        rows = conn.execute(
+            select(Question.id, Question.user_id, Question.title, Question.content).where(Question.id.in_(chunk))
+        ).all()
+        conn.execute(table.delete().where(table.c.question_id.in_(chunk)))
+        values = []
+        for row in rows:
+            sig = signature(row.title, row.content)
+            if sig is None:
+                continue
+            values.extend(
+                {
+                    "question_id": row.id,
+                    "band_no": band_no,
+                    "user_id": row.user_id,
+                    "band_hash": band_hash,
+                    "signature": sig if band_no == 0 else None,
+                }
+                for band_no, band_hash in enumerate(band_hashes(sig))
+            )
+        if values:
+            conn.execute(table.insert(), values)
+
+
+def candidates_statement(user_id: int, sig: bytes):
+    """与签名至少有一段相同的未删除错题及其完整签名，经 (user_id, band_hash) 索引定位。"""
+    full = aliased(QuestionFingerprint)
+    return (
+        select(QuestionFingerprint.question_id, full.signature, Question.title)
+        .join(full, and_(full.question_id == QuestionFingerprint.question_id, full.band_no == 0))
+        .join(Question, Question.id == QuestionFingerprint.question_id)
+        .where(
+            QuestionFingerprint.user_id == user_id,
+            QuestionFingerprint.band_hash.in_(band_hashes(sig)),
+            Question.is_deleted.is_(False),
+        )
+        .distinct()
+    )
+
+
+def clusters_statement(user_id: int):
+    """用户全部未删除错题的签名分段，按 band_hash 顺序读取索引。"""
+    return (
+        select(QuestionFingerprint.band_hash, QuestionFingerprint.question_id)
+        .join(Question, Question.id == QuestionFingerprint.question_id)
+        .where(QuestionFingerprint.user_id == user_id, Question.is_deleted.is_(False))
+        .order_by(QuestionFingerprint.band_hash)
+    )
+
+
+def find_similar(
+    user_id: int,
+    title: Optional[str],
+    content: Optional[str],
+    exclude_id: Optional[int] = None,
+    limit: int = 5,
+) -> List[Dict[str, object]]:
+    """查找与给定标题+内容近似的未删除错题，按相似度从高到低返回。"""
+    sig = signature(title, content)
+    if sig is None:
+        return []
+    stmt = candidates_statement(user_id, sig)
+    if exclude_id is not None:
+        stmt = stmt.where(QuestionFingerprint.question_id != exclude_id)
+    matches = []
+    for row in db.session.execute(stmt):
+        score = similarity(sig, row.signature)
+        if score >= Config.DUPLICATE_MIN_SIMILARITY:
+            matches.append({"id": row.question_id, "title": row.title, "similarity": score})
+    matches.sort(key=lambda item: (-item["similarity"], -item["id"]))
+    return matches[:limit]
+
+
+def find_clusters(user_id: int, min_similarity: Optional[float] = None) -> List[List[int]]:
+    """找出用户全部近似重复的错题簇（每簇至少 2 道），按簇大小从大到小返回错题 id。
+
+    按 band_hash 顺序读取一遍索引，只有落在同一分段的错题才加载签名并比较，
+    用并查集合并成簇；成本与错题数近似线性，而不是两两比较的 O(n²)。
+    """
+    min_similarity = Config.DUPLICATE_MIN_SIMILARITY if min_similarity is None else min_similarity
+    parent: Dict[int, int] = {}
+
+    def find(qid: int) -> int:
+        while parent.setdefault(qid, qid) != qid:
+            parent[qid] = parent[parent[qid]]
+            qid = parent[qid]
+        return qid
+
+    def union(a: int, b: int) -> None:
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    # 先收集同段的错题组，再一次性加载其中错题的签名
+    groups: List[List[int]] = []
+    current_hash, group = None, []
+    for band_hash, question_id in db.session.execute(clusters_statement(user_id)):
+        if band_hash != current_hash:
+            if len(group) > 1:
+                groups.append(group)
+            current_hash, group = band_hash, []
+        group.append(question_id)
+    if len(group) > 1:
+        groups.append(group)
+
+    signatures = _load_signatures({qid for group in groups for qid in group})
+    for group in groups:
+        # 签名完全相同的错题直接合并，不同签名之间才比较相似度
+        by_signature: Dict[bytes, int] = {}
+        for qid in group:
+            sig = signatures[qid]
+            if sig in by_signature:
+                union(by_signature[sig], qid)
+            else:
+                by_signature[sig] = qid
+        distinct = list(by_signature.items())
+        for i, (sig_a, qid_a) in enumerate(distinct):
+            for sig_b, qid_b in distinct[i + 1:]:
+                if find(qid_a) != find(qid_b) and similarity(sig_a, sig_b) >= min_similarity:
+                    union(qid_a, qid_b)
+
+    clusters: Dict[int, List[int]] = {}
+    for qid in parent:
+        clusters.setdefault(find(qid), []).append(qid)
+    return sorted(
+        (sorted(qids) for qids in clusters.values() if len(qids) > 1),
+        key=lambda qids: (-len(qids), qids[0]),
+    )
+
+
+def _load_signatures(question_ids: Set[int]) -> Dict[int, bytes]:
+    ids = sorted(question_ids)
+    signatures: Dict[int, bytes] = {}
+    for start in range(0, len(ids), 500):
+        signatures.update(
+            db.session.execute(
+                select(QuestionFingerprint.question_id, QuestionFingerprint.signature).where(
+                    QuestionFingerprint.question_id.in_(ids[start:start + 500]),
+                    QuestionFingerprint.band_no == 0,
+                )
+            ).all()
+        )
+    return signatures
+
+
+def _changed_question_ids(session: Session) -> Set[int]:
+    ids: Set[int] = set()
+    for obj in session.new:
+        if isinstance(obj, Question):
+            ids.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, Question):
+            state = inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in FINGERPRINT_FIELDS):
+                ids.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Question):
+            ids.add(obj.id)
+    ids.discard(None)
+    return ids
+
+
+def _sync_after_flush(session: Session, flush_context) -> None:
+    ids = _changed_question_ids(session)
+    if ids:
+        fingerprint_questions(session.connection(), ids)
+
+
+def init_duplicate_index() -> None:
+    """注册 flush 监听，使签名与错题数据保持同步。"""
+    if not event.contains(Session, "after_flush", _sync_after_flush):
+        event.listen(Session, "after_flush", _sync_after_flush)
@@ -0,0 +1,119 @@
+"""密码哈希服务：把 CPU 密集的哈希计算放到有界的进程池中执行。"""
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from ..config import Config
+
+
+class HasherBusyError(Exception):
+    """哈希任务排队已满或等待超时，调用方应当快速拒绝请求（429）。"""
+
+
+class PasswordHasher:
+    """
+    带排队上限的密码哈希服务。
+
+    - workers 为 0 时在当前线程内直接计算（开发环境、单元脚本）
+    - 正在执行和排队中的任务总数达到 max_pending 时立即抛出 HasherBusyError，
+      不让登录高峰把所有请求线程都堵在哈希计算上
+    - needs_rehash() 用于登录成功后把旧参数的哈希升级为当前配置
+    """
+
+    def __init__(self, method: str, workers: int = 0, max_pending: int = 32, timeout: float = 10.0):
+        self.method = method
+        self.workers = max(int(workers), 0)
+        self.max_pending = max(int(max_pending), 1)
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # 延迟创建进程池，避免在导入阶段 fork；在锁内检查并创建，并发的首次请求只会创建一个
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def _reserve(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HasherBusyError("密码校验繁忙，请稍后重试")
+            self._pending += 1
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _discard_executor(self, executor: ProcessPoolExecutor) -> None:
+        """丢弃已损坏的进程池，下次提交时在锁内重新创建；其他线程已替换过时不重复丢弃。"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run_inline(self, func, *args):
+        try:
+            return func(*args)
+        finally:
+            self._release()
+
+    def _run(self, func, *args):
+        self._reserve()
+        if not self.workers:
+            return self._run_inline(func, *args)
+
+        executor = self._get_executor()
+        try:
+            future = executor.submit(func, *args)
+        except BrokenProcessPool:
+            # 工作进程异常退出：丢弃旧进程池，本次在当前线程内完成
+            self._discard_executor(executor)
+            return self._run_inline(func, *args)
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError as exc:
+            raise HasherBusyError("密码校验超时，请稍后重试") from exc
+        except BrokenProcessPool:
+            # 工作进程在计算过程中退出：名额已由回调释放，重新占用后在当前线程内完成
+            self._discard_executor(executor)
+            self._reserve()
+            return self._run_inline(func, *args)
+
+    def hash(self, password: str) -> str:
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """哈希使用的算法/参数与当前配置不一致时返回 True。"""
+        if not password_hash or "$" not in password_hash:
+            return True
+        return password_hash.split("$", 1)[0] != self.method
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# 全局哈希服务实例
+password_hasher = PasswordHasher(
+    Config.PASSWORD_HASH_METHOD,
+    workers=Config.PASSWORD_HASH_WORKERS,
+    max_pending=Config.PASSWORD_HASH_MAX_PENDING,
+    timeout=Config.PASSWORD_HASH_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,265 @@
+"""软删除数据的清理：硬删除过期的已删除错题/科目，删除不再被引用的上传文件，回收 SQLite 空间。
+
+删除错题只是把 is_deleted 置为 True，这些行及其选项、标签会一直留在表和索引里。
+清理任务按 updated_at（软删除时刷新）找出超过保留天数的已删除错题，每批一个短事务
+删除错题行及其选项、标签、复习事件，并推进增量同步的清理水位（见 services/changes.py）。
+被删除错题引用的上传文件在全部批次结束后，确认没有其他错题或头像仍引用时才删除。
+
+可以通过命令行 ``flask --app app questions purge`` 配合 cron 执行，
+也可以设置 Config.PURGE_INTERVAL_HOURS 由应用进程定时执行。
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Set
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection, Engine
+
+from ..config import Config
+from ..models import db, Question, QuestionFingerprint, QuestionOption, QuestionTag, ReviewEvent, Subject, SyncState, User
+from . import changes
+from .question_io import upload_path
+
+logger = logging.getLogger(__name__)
+
+URL_COLUMNS = ("images", "error_images", "answer_images")
+
+
+@dataclass
+class PurgeResult:
+    questions: int = 0
+    options: int = 0
+    tags: int = 0
+    subjects: int = 0
+    files: int = 0
+    file_bytes: int = 0
+    db_free_bytes: int = 0  # 删除后数据库内的空闲页大小
+    vacuumed_bytes: int = 0  # 增量 VACUUM 实际归还给文件系统的大小
+    dry_run: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "questions": self.questions,
+            "options": self.options,
+            "tags": self.tags,
+            "subjects": self.subjects,
+            "files": self.files,
+            "file_bytes": self.file_bytes,
+            "db_free_bytes": self.db_free_bytes,
+            "vacuumed_bytes": self.vacuumed_bytes,
+            "dry_run": self.dry_run,
+        }
+
+
+def expired_questions_statement(cutoff: datetime, limit: Optional[int] = None):
+    """超过保留期的已删除错题，经部分索引 ix_questions_deleted_updated 读取。"""
+    stmt = (
+        select(Question.id, Question.change_seq, *(getattr(Question, name) for name in URL_COLUMNS))
+        # 写成 is_deleted = 1（而不是 IS 1），与部分索引的条件一致才能使用该索引
+        .where(Question.is_deleted == True, Question.updated_at < cutoff)  # noqa: E712
+        .order_by(Question.updated_at)
+    )
+    return stmt if limit is None else stmt.limit(limit)
+
+
+def _urls(rows) -> Set[str]:
+    return {
+        url
+        for row in rows
+        for name in URL_COLUMNS
+        for url in (getattr(row, name) or ())
+        if isinstance(url, str)
+    }
+
+
+def _purge_question_batch(conn: Connection, rows, result: PurgeResult) -> None:
+    ids = [row.id for row in rows]
+    result.options += conn.execute(delete(QuestionOption).where(QuestionOption.question_id.in_(ids))).rowcount
+    # 已删除错题不计入标签的 question_count，删除关联不需要重新统计
+    result.tags += conn.execute(delete(QuestionTag).where(QuestionTag.question_id.in_(ids))).rowcount
+    conn.execute(delete(QuestionFingerprint).where(QuestionFingerprint.question_id.in_(ids)))
+    conn.execute(delete(ReviewEvent).where(ReviewEvent.question_id.in_(ids)))
+    result.questions += conn.execute(delete(Question).where(Question.id.in_(ids))).rowcount
+    watermark = max(row.change_seq for row in rows)
+    conn.execute(
+        sqlite_insert(SyncState.__table__)
+        .values(name=changes.PURGED, value=0)
+        .on_conflict_do_nothing(index_elements=["name"])
+    )
+    conn.execute(
+        SyncState.__table__.update()
+        .where(SyncState.name == changes.PURGED)
+        .values(value=func.max(SyncState.value, watermark))
+    )
+
+
+def _purge_subjects(engine: Engine, cutoff: datetime, batch_size: int, result: PurgeResult) -> None:
+    """删除过期的已删除科目，仍被任何错题引用的科目保留。"""
+    expired = select(Subject.id).where(
+        Subject.is_deleted.is_(True),
+        Subject.updated_at < cutoff,
+        ~select(Question.id).where(Question.subject_id == Subject.id).exists(),
+    )
+    if result.dry_run:
+        with engine.connect() as conn:
+            result.subjects = conn.execute(select(func.count()).select_from(expired.subquery())).scalar()
+        return
+    while True:
+        with engine.begin() as conn:
+            ids = conn.execute(expired.limit(batch_size)).scalars().all()
+            if not ids:
+                return
+            result.subjects += conn.execute(delete(Subject).where(Subject.id.in_(ids))).rowcount
+
+
+def _still_referenced(engine: Engine, urls: Set[str], batch_size: int, exclude_ids: Set[int]) -> Set[str]:
+    """在剩余的错题（exclude_ids 除外）和用户头像中查找仍被引用的 URL，按主键分批读取。"""
+    found: Set[str] = set()
+    with engine.connect() as conn:
+        found.update(conn.execute(select(User.avatar).where(User.avatar.in_(urls))).scalars())
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                select(Question.id, *(getattr(Question, name) for name in URL_COLUMNS))
+                .where(Question.id > last_id)
+                .order_by(Question.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                return found
+            found.update(_urls(row for row in rows if row.id not in exclude_ids) & urls)
+            last_id = rows[-1].id
+
+
+def _remove_files(urls: Iterable[str], result: PurgeResult) -> None:
+    for url in sorted(urls):
+        path: Optional[Path] = upload_path(url)
+        if path is None:
+            continue
+        try:
+            size = path.stat().st_size
+            if not result.dry_run:
+                path.unlink()
+        except OSError as exc:
+            logger.warning("purge: failed to remove %s: %s", path, exc)
+            continue
+        result.files += 1
+        result.file_bytes += size
+
+
+def _free_bytes(engine: Engine) -> int:
+    with engine.connect() as conn:
+        page_size = conn.exec_driver_sql("PRAGMA page_size").scalar()
+        return conn.exec_driver_sql("PRAGMA freelist_count").scalar() * page_size
+
+
+def incremental_vacuum_enabled(engine: Engine) -> bool:
+    """SQLite 数据库是否处于 auto_vacuum=INCREMENTAL 模式。"""
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.connect() as conn:
+        return conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2
+
+
+def incremental_vacuum(engine: Engine, pages_per_step: int = 1000) -> Optional[int]:
+    """分步执行 PRAGMA incremental_vacuum，返回归还的字节数。
+
+    数据库未启用 auto_vacuum=INCREMENTAL 时返回 None，需要先执行一次
+    ``flask --app app db vacuum``。
+    """
+    if not incremental_vacuum_enabled(engine):
+        return None
+    with engine.connect() as conn:
+        page_size = conn.exec_driver_sql("PRAGMA page_size").scalar()
+    reclaimed = 0
+    while True:
+        with engine.begin() as conn:
+            before = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+            if not before:
+                return reclaimed
+            conn.exec_driver_sql(f"PRAGMA incremental_vacuum({int(pages_per_step)})")
+            after = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+        if after >= before:
+            return reclaimed
+        reclaimed += (before - after) * page_size
+
+
+def purge_deleted(
+    engine: Optional[Engine] = None,
+    retention_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    vacuum: bool = False,
+    dry_run: bool = False,
+    pause: float = 0.0,
+) -> PurgeResult:
+    """硬删除超过保留天数的已删除数据，返回清理统计。
+
+    dry_run 时只统计将要删除的错题、科目和文件，不做任何修改。
+    """
+    engine = engine or db.engine
+    retention_days = Config.PURGE_RETENTION_DAYS if retention_days is None else retention_days
+    batch_size = batch_size or Config.PURGE_BATCH_SIZE
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    result = PurgeResult(dry_run=dry_run)
+    files: Set[str] = set()
+
+    if dry_run:
+        # 试运行：只读取一遍将被清理的错题，引用检查时把它们排除在外
+        planned: Set[int] = set()
+        with engine.connect() as conn:
+            for row in conn.execute(expired_questions_statement(cutoff)):
+                planned.add(row.id)
+                files.update(_urls([row]))
+        result.questions = len(planned)
+    else:
+        planned = set()
+        while True:
+            with engine.begin() as conn:
+                rows = conn.execute(expired_questions_statement(cutoff, batch_size)).all()
+                if not rows:
+                    break
+                files.update(_urls(rows))
+                _purge_question_batch(conn, rows, result)
+            if pause:
+                time.sleep(pause)
+
+    _purge_subjects(engine, cutoff, batch_size, result)
+    if files:
+        _remove_files(files - _still_referenced(engine, files, Config.EXPORT_BATCH_SIZE, planned), result)
+
+    if engine.dialect.name == "sqlite" and not dry_run:
+        result.db_free_bytes = _free_bytes(engine)
+        if vacuum:
+            result.vacuumed_bytes = incremental_vacuum(engine) or 0
+    return result
+
+
+def init_purge_scheduler(app) -> None:
+    """PURGE_INTERVAL_HOURS 大于 0 时启动后台线程定时执行清理。
+
+    多个进程同时执行也是安全的：每批在独立事务中删除，重复删除文件时忽略即可。
+    """
+    interval = app.config.get("PURGE_INTERVAL_HOURS") or 0
+    if interval <= 0 or app.extensions.get("purge_scheduler"):
+        return
+
+    def _loop():
+        while True:
+            time.sleep(interval * 3600)
+            try:
+                with app.app_context():
+                    result = purge_deleted(vacuum=app.config.get("PURGE_VACUUM", False))
+                logger.info("purge: %s", result.to_dict())
+            except Exception:  # noqa: BLE001 - 定时任务失败只记录日志，下个周期重试
+                logger.exception("purge: scheduled run failed")
+
+    thread = threading.Thread(target=_loop, name="purge-scheduler", daemon=True)
+    app.extensions["purge_scheduler"] = thread
+    thread.start()
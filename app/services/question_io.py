@@ -0,0 +1,539 @@
+"""错题批量导入导出：NDJSON / CSV 流式读写，导出另支持附带上传文件的 zip。
+
+导入时文件按行读取，每攒够 batch_size 条合法记录执行一个事务（错题、选项、标签
+关联各一条批量 INSERT），内存占用只与批次大小有关，与文件大小无关。
+Core 写入不经过 ORM flush，所以每批提交前显式刷新标签计数和全文索引。
+
+导出按主键做 keyset 分批扫描，每批只查一次选项和标签，序列化后立即交给响应生成器，
+同样不会把整个错题本加载到内存。
+
+记录字段与 POST /api/questions 的请求体一致，另外支持用 subject（科目名称）
+代替 subject_id。CSV 中 tags / images / error_images / answer_images 用 ``|``
+分隔多个值，options 为 JSON 数组。导出的文件可以直接再导入。
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+import zipfile
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..config import Config
+from ..utils.params import to_int
+from ..models import db, Question, QuestionOption, QuestionTag, Subject
+from . import duplicates, search
+from . import tags as tags_service
+
+FORMATS = ("ndjson", "csv")
+EXPORT_FORMATS = FORMATS + ("zip",)
+LIST_SEPARATOR = "|"
+IMAGE_FIELDS = ("images", "error_images", "answer_images")
+CSV_LIST_FIELDS = ("tags",) + IMAGE_FIELDS
+BOOL_FIELDS = ("is_important", "is_mastered")
+TEXT_FIELDS = ("title", "content", "answer", "error_reason", "question_type")
+
+_TRUE_VALUES = {"1", "true", "yes", "y", "是"}
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in _TRUE_VALUES
+    return bool(value)
+
+
+# ---------- 与单条创建共用的校验/清洗 ----------
+def missing_fields(payload: Dict[str, Any]) -> List[str]:
+    """返回缺少的必填字段；有对应图片时 content/answer 的文字可以为空。"""
+    missing = [name for name in ("title", "question_type", "difficulty") if not payload.get(name)]
+    if not payload.get("content") and not payload.get("images"):
+        missing.append("content")
+    if not payload.get("answer") and not payload.get("answer_images"):
+        missing.append("answer")
+    return missing
+
+
+def clean_options(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """过滤缺少选项标识或内容的选项，返回可直接写入 question_options 的字段。"""
+    cleaned = []
+    for item in items:
+        option_key = (item.get("option_key") or "").strip()
+        option_text = (item.get("option_text") or "").strip()
+        if not option_key or not option_text:
+            continue
+        cleaned.append(
+            {
+                "option_key": option_key,
+                "option_text": option_text,
+                "is_correct": bool(item.get("is_correct")),
+                "sort_order": int(item.get("sort_order") or 0),
+            }
+        )
+    return cleaned
+
+
+def clean_image_urls(urls: List[str]) -> Optional[List[str]]:
+    """去掉空值后的 URL 列表，没有图片时返回 None（存为 NULL）。"""
+    valid_urls = [url.strip() for url in urls if isinstance(url, str) and url.strip()]
+    return valid_urls or None
+
+
+# ---------- 流式解析 ----------
+def detect_format(explicit: Optional[str], filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    """依次根据显式参数、文件扩展名、Content-Type 判断格式，无法识别时返回 None。"""
+    if explicit:
+        explicit = explicit.lower()
+        return explicit if explicit in FORMATS else None
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if name.endswith(".csv"):
+        return "csv"
+    content_type = (content_type or "").lower()
+    if "ndjson" in content_type or "jsonl" in content_type:
+        return "ndjson"
+    if "csv" in content_type:
+        return "csv"
+    return None
+
+
+# 每条记录为 (行号, 记录, 解析错误)，解析失败时记录为 None
+ParsedRecord = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+
+def _text_stream(stream: IO[bytes]) -> IO[str]:
+    # utf-8-sig 兼容 Excel 导出的带 BOM 文件；newline="" 交给 csv 处理引号内的换行
+    return io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+
+def iter_ndjson(stream: IO[bytes]) -> Iterator[ParsedRecord]:
+    for line_no, line in enumerate(_text_stream(stream), start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield line_no, None, f"JSON 解析失败：{exc.msg}"
+            continue
+        if not isinstance(record, dict):
+            yield line_no, None, "每行必须是一个 JSON 对象"
+            continue
+        yield line_no, record, None
+
+
+def _csv_record(row: Dict[str, Any]) -> Dict[str, Any]:
+    record: Dict[str, Any] = {}
+    for key, value in row.items():
+        if key is None:
+            continue  # 多出来的列
+        key = key.strip()
+        value = (value or "").strip()
+        if not value:
+            continue
+        if key in CSV_LIST_FIELDS:
+            record[key] = value.split(LIST_SEPARATOR)
+        elif key == "options":
+            record[key] = json.loads(value)
+        else:
+            record[key] = value
+    return record
+
+
+def iter_csv(stream: IO[bytes]) -> Iterator[ParsedRecord]:
+    reader = csv.DictReader(_text_stream(stream))
+    for row in reader:
+        try:
+            yield reader.line_num, _csv_record(row), None
+        except ValueError:
+            yield reader.line_num, None, "options 列必须是 JSON 数组"
+
+
+def iter_records(stream: IO[bytes], fmt: str) -> Iterator[ParsedRecord]:
+    parser = iter_csv if fmt == "csv" else iter_ndjson
+    line_no = 0
+    try:
+        for line_no, record, error in parser(stream):
+            yield line_no, record, error
+    except (UnicodeDecodeError, csv.Error) as exc:
+        reason = "文件不是 UTF-8 编码" if isinstance(exc, UnicodeDecodeError) else str(exc)
+        yield line_no + 1, None, f"解析中止：{reason}"
+
+
+# ---------- 导入 ----------
+@dataclass
+class ImportResult:
+    total: int = 0
+    imported: int = 0
+    failed: int = 0
+    max_errors: int = 1000
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+
+    def add_error(self, line: int, message: str) -> None:
+        self.failed += 1
+        # 只保留前 max_errors 条明细，错误再多也不会占用更多内存
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "message": message})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+class RowError(ValueError):
+    """单条记录校验失败。"""
+
+
+class QuestionImporter:
+    """把解析后的记录校验并分批写入指定用户名下。"""
+
+    def __init__(self, user_id: int, batch_size: Optional[int] = None, max_errors: Optional[int] = None):
+        self.user_id = user_id
+        self.batch_size = max(batch_size or Config.IMPORT_BATCH_SIZE, 1)
+        self.result = ImportResult(max_errors=max_errors or Config.IMPORT_MAX_ERRORS)
+        subjects = db.session.execute(
+            db.select(Subject.id, Subject.name).where(
+                Subject.user_id == user_id, Subject.is_deleted.is_(False)
+            )
+        ).all()
+        self._subject_ids = {row.id for row in subjects}
+        self._subject_names = {row.name: row.id for row in subjects}
+
+    def run(self, records: Iterator[ParsedRecord]) -> ImportResult:
+        batch: List[Dict[str, Any]] = []
+        for line_no, record, error in records:
+            self.result.total += 1
+            if error is None:
+                try:
+                    batch.append(self._validate(line_no, record))
+                except RowError as exc:
+                    error = str(exc)
+            if error is not None:
+                self.result.add_error(line_no, error)
+            if len(batch) >= self.batch_size:
+                self._write_batch(batch)
+                batch = []
+        if batch:
+            self._write_batch(batch)
+        return self.result
+
+    def _subject_id(self, record: Dict[str, Any]) -> Optional[int]:
+        if record.get("subject_id"):
+            subject_id = to_int(record.get("subject_id"))
+            if subject_id not in self._subject_ids:
+                raise RowError("科目不存在或者已被删除")
+            return subject_id
+        if record.get("subject"):
+            subject_id = self._subject_names.get(str(record["subject"]).strip())
+            if subject_id is None:
+                raise RowError(f"科目不存在：{record['subject']}")
+            return subject_id
+        return None
+
+    @staticmethod
+    def _list_field(record: Dict[str, Any], name: str) -> List[Any]:
+        value = record.get(name)
+        if value is None:
+            return []
+        if not isinstance(value, list):
+            raise RowError(f"{name} 必须是数组")
+        return value
+
+    def _validate(self, line_no: int, record: Dict[str, Any]) -> Dict[str, Any]:
+        missing = missing_fields(record)
+        if missing:
+            raise RowError(f"缺少必要参数：{', '.join(missing)}")
+        question: Dict[str, Any] = {
+            name: (None if record.get(name) is None else str(record[name])) for name in TEXT_FIELDS
+        }
+        try:
+            question.update(
+                user_id=self.user_id,
+                subject_id=self._subject_id(record),
+                difficulty=to_int(record.get("difficulty"), 2),
+                review_status=int(record.get("review_status", 0)),
+                **{name: _to_bool(record.get(name, False)) for name in BOOL_FIELDS},
+                **{name: clean_image_urls(self._list_field(record, name)) for name in IMAGE_FIELDS},
+            )
+            options_payload = self._list_field(record, "options")
+            if not all(isinstance(item, dict) for item in options_payload):
+                raise RowError("options 的每一项必须是对象")
+            options = clean_options(options_payload)
+        except (TypeError, ValueError) as exc:
+            raise RowError(str(exc) if isinstance(exc, RowError) else "字段类型不正确") from None
+        tag_names = tags_service.clean_tag_names(self._list_field(record, "tags"))
+        return {"line": line_no, "question": question, "options": options, "tags": tag_names}
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        """一个事务写入一批错题；失败时整批回滚并记为失败。"""
+        questions = Question.__table__
+        try:
+            conn = db.session.connection()
+            ids = conn.execute(
+                questions.insert().returning(questions.c.id, sort_by_parameter_order=True),
+                [item["question"] for item in batch],
+            ).scalars().all()
+
+            options = [
+                {"question_id": question_id, **option}
+                for question_id, item in zip(ids, batch)
+                for option in item["options"]
+            ]
+            if options:
+                conn.execute(QuestionOption.__table__.insert(), options)
+
+            tag_ids = tags_service.resolve_tag_ids(
+                conn, self.user_id, (name for item in batch for name in item["tags"])
+            )
+            links = [
+                {"question_id": question_id, "tag_id": tag_ids[name], "name": name}
+                for question_id, item in zip(ids, batch)
+                for name in item["tags"]
+            ]
+            if links:
+                conn.execute(QuestionTag.__table__.insert(), links)
+                tags_service.refresh_counts(conn, tag_ids.values())
+            if search.is_available(conn):
+                search.reindex_questions(conn, ids)
+            duplicates.fingerprint_questions(conn, ids)
+            db.session.commit()
+        except SQLAlchemyError as exc:
+            db.session.rollback()
+            for item in batch:
+                self.result.add_error(item["line"], f"写入失败：{exc.__class__.__name__}")
+            return
+        self.result.imported += len(batch)
+
+
+def import_questions(user_id: int, stream: IO[bytes], fmt: str, batch_size: Optional[int] = None) -> ImportResult:
+    """从二进制流导入错题，返回统计结果。"""
+    return QuestionImporter(user_id, batch_size=batch_size).run(iter_records(stream, fmt))
+
+
+# ---------- 导出 ----------
+EXPORT_FIELDS = (
+    "id", "title", "question_type", "difficulty", "subject", "content", "answer", "error_reason",
+    "review_status", "review_count", "mastery_status", "is_important", "is_mastered",
+    "tags", "options", "images", "error_images", "answer_images", "created_at", "last_review_at",
+)
+UPLOAD_URL_PREFIX = "/static/uploads/"
+_COPY_CHUNK_SIZE = 64 * 1024
+
+
+def export_batch_statement(user_id: int, after_id: int, batch_size: int):
+    """按主键 keyset 分页取一批错题，只选导出需要的列。"""
+    q = Question.__table__
+    return (
+        select(
+            q.c.id, q.c.subject_id, q.c.title, q.c.question_type, q.c.difficulty, q.c.content,
+            q.c.answer, q.c.error_reason, q.c.review_status, q.c.review_count, q.c.mastery_status,
+            q.c.is_important, q.c.is_mastered, q.c.images, q.c.error_images, q.c.answer_images,
+            q.c.created_at, q.c.last_review_at,
+        )
+        .where(q.c.user_id == user_id, q.c.is_deleted.is_(False), q.c.id > after_id)
+        .order_by(q.c.id)
+        .limit(batch_size)
+    )
+
+
+def _url_list(value: Any) -> List[str]:
+    return value if isinstance(value, list) else []
+
+
+def _format_datetime(value) -> Optional[str]:
+    return value.strftime("%Y-%m-%d %H:%M:%S") if value else None
+
+
+def iter_export_batches(user_id: int, batch_size: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+    """逐批产出导出记录（与导入格式一致的 dict），每批 3 条查询。"""
+    batch_size = max(batch_size or Config.EXPORT_BATCH_SIZE, 1)
+    subjects = dict(db.session.execute(select(Subject.id, Subject.name).where(Subject.user_id == user_id)).all())
+    options_table = QuestionOption.__table__
+    tags_table = QuestionTag.__table__
+    last_id = 0
+    while True:
+        rows = db.session.execute(export_batch_statement(user_id, last_id, batch_size)).all()
+        if not rows:
+            return
+        ids = [row.id for row in rows]
+        options: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for row in db.session.execute(
+            select(
+                options_table.c.question_id, options_table.c.option_key, options_table.c.option_text,
+                options_table.c.is_correct, options_table.c.sort_order,
+            )
+            .where(options_table.c.question_id.in_(ids))
+            .order_by(options_table.c.question_id, options_table.c.sort_order, options_table.c.id)
+        ):
+            options[row.question_id].append(
+                {
+                    "option_key": row.option_key,
+                    "option_text": row.option_text,
+                    "is_correct": bool(row.is_correct),
+                    "sort_order": row.sort_order,
+                }
+            )
+        tags: Dict[int, List[str]] = defaultdict(list)
+        for row in db.session.execute(
+            select(tags_table.c.question_id, tags_table.c.name)
+            .where(tags_table.c.question_id.in_(ids))
+            .order_by(tags_table.c.question_id, tags_table.c.id)
+        ):
+            tags[row.question_id].append(row.name)
+
+        yield [
+            {
+                "id": row.id,
+                "title": row.title,
+                "question_type": row.question_type,
+                "difficulty": row.difficulty,
+                "subject": subjects.get(row.subject_id),
+                "content": row.content,
+                "answer": row.answer,
+                "error_reason": row.error_reason,
+                "review_status": row.review_status,
+                "review_count": row.review_count,
+                "mastery_status": row.mastery_status,
+                "is_important": bool(row.is_important),
+                "is_mastered": bool(row.is_mastered),
+                "tags": tags.get(row.id, []),
+                "options": options.get(row.id, []),
+                "images": _url_list(row.images),
+                "error_images": _url_list(row.error_images),
+                "answer_images": _url_list(row.answer_images),
+                "created_at": _format_datetime(row.created_at),
+                "last_review_at": _format_datetime(row.last_review_at),
+            }
+            for row in rows
+        ]
+        last_id = ids[-1]
+        # 客户端下载期间不持有读事务，避免长时间导出阻止 WAL checkpoint
+        db.session.rollback()
+
+
+def _ndjson_chunk(records: List[Dict[str, Any]]) -> bytes:
+    return "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode("utf-8")
+
+
+def _csv_value(name: str, value: Any) -> Any:
+    if name in CSV_LIST_FIELDS:
+        return LIST_SEPARATOR.join(value)
+    if name == "options":
+        return json.dumps(value, ensure_ascii=False) if value else ""
+    if isinstance(value, bool):
+        return int(value)
+    return "" if value is None else value
+
+
+def iter_ndjson_export(user_id: int, batch_size: Optional[int] = None) -> Iterator[bytes]:
+    for records in iter_export_batches(user_id, batch_size):
+        yield _ndjson_chunk(records)
+
+
+def iter_csv_export(user_id: int, batch_size: Optional[int] = None) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    # 带 BOM，Excel 打开时不会乱码；表头先发出，客户端立即开始接收
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+    for records in iter_export_batches(user_id, batch_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(name, record[name]) for name in EXPORT_FIELDS] for record in records)
+        yield buffer.getvalue().encode("utf-8")
+
+
+def upload_path(url: str) -> Optional[Path]:
+    """把 /static/uploads/... 形式的 URL 映射为本地文件，越界或不存在时返回 None。"""
+    if not isinstance(url, str) or not url.startswith(UPLOAD_URL_PREFIX):
+        return None
+    base = Path(Config.UPLOAD_BASE_DIR).resolve()
+    path = (base / url[len(UPLOAD_URL_PREFIX):]).resolve()
+    if base not in path.parents or not path.is_file():
+        return None
+    return path
+
+
+class _StreamBuffer(io.RawIOBase):
+    """zipfile 的只写输出：不可 seek，写入的数据由生成器取走后清空。"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip_export(user_id: int, batch_size: Optional[int] = None) -> Iterator[bytes]:
+    """zip 中包含 questions.ndjson 和错题引用的上传文件（路径与 URL 一致）。
+
+    先流式写完 questions.ndjson，再扫描一遍图片列逐个写入文件，
+    文件按 64KB 分块复制，大文件也不会整个读进内存。
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        with archive.open("questions.ndjson", "w", force_zip64=True) as entry:
+            for records in iter_export_batches(user_id, batch_size):
+                entry.write(_ndjson_chunk(records))
+                yield buffer.drain()
+        yield buffer.drain()
+
+        written = set()
+        for url in _iter_upload_urls(user_id, batch_size):
+            path = upload_path(url)
+            arcname = url.lstrip("/")
+            if path is None or arcname in written:
+                continue
+            written.add(arcname)
+            info = zipfile.ZipInfo.from_file(path, arcname)
+            info.compress_type = zipfile.ZIP_STORED  # 图片本身已压缩
+            with path.open("rb") as source, archive.open(info, "w", force_zip64=True) as entry:
+                for chunk in iter(lambda: source.read(_COPY_CHUNK_SIZE), b""):
+                    entry.write(chunk)
+                    yield buffer.drain()
+    yield buffer.drain()
+
+
+def _iter_upload_urls(user_id: int, batch_size: Optional[int]) -> Iterator[str]:
+    batch_size = max(batch_size or Config.EXPORT_BATCH_SIZE, 1)
+    last_id = 0
+    while True:
+        rows = db.session.execute(export_batch_statement(user_id, last_id, batch_size)).all()
+        if not rows:
+            return
+        for row in rows:
+            for column in (row.images, row.error_images, row.answer_images):
+                yield from _url_list(column)
+        last_id = rows[-1].id
+
+
+EXPORT_MIMETYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "zip": "application/zip",
+}
+
+
+def export_questions(user_id: int, fmt: str, batch_size: Optional[int] = None) -> Iterator[bytes]:
+    """按格式返回导出内容的字节块生成器。"""
+    writers = {"ndjson": iter_ndjson_export, "csv": iter_csv_export, "zip": iter_zip_export}
+    return writers[fmt](user_id, batch_size)
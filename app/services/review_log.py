@@ -0,0 +1,171 @@
+"""复习事件日志：记录每次复习结果，并按时间范围统计复习活动。
+
+submit_review 在更新错题的复习状态之前追加一条 review_events，记录结果、时间、
+距上次复习的间隔、作答用时和调度出的间隔天数。表只允许插入（UPDATE 由触发器拒绝），
+清理任务硬删除错题时才一并删除其事件。
+
+统计都是 (user_id, reviewed_at) 索引上的一段范围：今日复习量、每日趋势、
+本周掌握数用一条聚合查询得到，不再依赖错题上只保存最近一次的 last_review_at。
+连续复习天数按时间窗口从今天往前读取有复习的日期，成本只与连续天数有关。
+已软删除错题的事件仍然计入，复习活动确实发生过。
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import DDL, event, func, select
+from sqlalchemy.engine import Connection
+
+from ..models import db, ReviewEvent
+
+STREAK_WINDOW_DAYS = 31  # 计算连续天数时每次读取的天数
+
+TRIGGERS = {
+    "trg_review_events_append_only": (
+        "BEFORE UPDATE ON review_events "
+        "BEGIN SELECT RAISE(ABORT, 'review_events is append-only'); END"
+    ),
+}
+_TRIGGER_DDL = [
+    DDL(f"CREATE TRIGGER IF NOT EXISTS {name} {body}").execute_if(dialect="sqlite")
+    for name, body in TRIGGERS.items()
+]
+
+
+def create_triggers(conn: Connection) -> None:
+    """创建禁止修改事件的触发器，已存在时跳过。"""
+    for name, body in TRIGGERS.items():
+        conn.exec_driver_sql(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def init_review_log() -> None:
+    """create_all 建 review_events 表时一并创建触发器；已有数据库由迁移创建。"""
+    for ddl in _TRIGGER_DDL:
+        if not event.contains(ReviewEvent.__table__, "after_create", ddl):
+            event.listen(ReviewEvent.__table__, "after_create", ddl)
+
+
+def record_review(
+    question,
+    result: str,
+    now: datetime,
+    interval_days: Optional[int] = None,
+    duration_ms: Optional[int] = None,
+) -> ReviewEvent:
+    """追加一条复习事件，需要在修改 last_review_at 之前调用。"""
+    elapsed = None
+    if question.last_review_at is not None:
+        elapsed = max(int((now - question.last_review_at).total_seconds()), 0)
+    review_event = ReviewEvent(
+        user_id=question.user_id,
+        question_id=question.id,
+        result=result,
+        reviewed_at=now,
+        elapsed_seconds=elapsed,
+        duration_ms=duration_ms,
+        interval_days=interval_days,
+    )
+    db.session.add(review_event)
+    return review_event
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, datetime.min.time())
+
+
+def reviewed_questions_statement(user_id: int, start: datetime, end: datetime, result: Optional[str] = None):
+    """时间范围内复习过的不同错题数。"""
+    stmt = select(func.count(func.distinct(ReviewEvent.question_id))).where(
+        ReviewEvent.user_id == user_id,
+        ReviewEvent.reviewed_at >= start,
+        ReviewEvent.reviewed_at < end,
+    )
+    if result is not None:
+        stmt = stmt.where(ReviewEvent.result == result)
+    return stmt
+
+
+def daily_counts_statement(user_id: int, start: datetime, end: datetime):
+    """时间范围内按天（UTC）统计复习过的不同错题数，一条 GROUP BY 完成。"""
+    day = func.date(ReviewEvent.reviewed_at)
+    return (
+        select(day.label("day"), func.count(func.distinct(ReviewEvent.question_id)).label("count"))
+        .where(
+            ReviewEvent.user_id == user_id,
+            ReviewEvent.reviewed_at >= start,
+            ReviewEvent.reviewed_at < end,
+        )
+        .group_by(day)
+    )
+
+
+def active_days_statement(user_id: int, start: datetime, end: datetime):
+    """时间范围内有复习记录的日期（UTC，'YYYY-MM-DD'），只扫描索引。"""
+    return (
+        select(func.date(ReviewEvent.reviewed_at).label("day"))
+        .where(
+            ReviewEvent.user_id == user_id,
+            ReviewEvent.reviewed_at >= start,
+            ReviewEvent.reviewed_at < end,
+        )
+        .distinct()
+    )
+
+
+def question_history_statement(question_id: int, limit: int):
+    """单题最近的复习事件，按时间从新到旧。"""
+    return (
+        select(ReviewEvent)
+        .where(ReviewEvent.question_id == question_id)
+        .order_by(ReviewEvent.reviewed_at.desc(), ReviewEvent.id.desc())
+        .limit(limit)
+    )
+
+
+def reviewed_count(user_id: int, start_day: date, end_day: date, result: Optional[str] = None) -> int:
+    """[start_day, end_day] 内复习过的不同错题数，result 不为空时只统计该结果。"""
+    stmt = reviewed_questions_statement(
+        user_id, _day_start(start_day), _day_start(end_day + timedelta(days=1)), result
+    )
+    return db.session.execute(stmt).scalar() or 0
+
+
+def daily_counts(user_id: int, end_day: date, days: int) -> Dict[date, int]:
+    """截至 end_day（含）最近 days 天每天复习过的不同错题数，没有复习的日期为 0。"""
+    start_day = end_day - timedelta(days=days - 1)
+    counts = {start_day + timedelta(days=i): 0 for i in range(days)}
+    rows = db.session.execute(
+        daily_counts_statement(user_id, _day_start(start_day), _day_start(end_day + timedelta(days=1)))
+    )
+    for day, count in rows:
+        counts[date.fromisoformat(day)] = count
+    return counts
+
+
+def streak_days(user_id: int, today: date) -> int:
+    """截至今天（含）连续有复习的天数，今天没有复习时为 0。
+
+    每次读取 STREAK_WINDOW_DAYS 天内有复习的日期，窗口内每天都有复习才继续往前读。
+    """
+    streak = 0
+    end_day = today
+    while True:
+        start_day = end_day - timedelta(days=STREAK_WINDOW_DAYS - 1)
+        days = {
+            date.fromisoformat(day)
+            for day in db.session.execute(
+                active_days_statement(user_id, _day_start(start_day), _day_start(end_day + timedelta(days=1)))
+            ).scalars()
+        }
+        cursor = end_day
+        while cursor >= start_day and cursor in days:
+            streak += 1
+            cursor -= timedelta(days=1)
+        if cursor >= start_day:
+            return streak
+        end_day = start_day - timedelta(days=1)
+
+
+def question_history(question_id: int, limit: int = 50) -> List[ReviewEvent]:
+    return list(db.session.execute(question_history_statement(question_id, limit)).scalars())
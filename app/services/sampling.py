@@ -0,0 +1,145 @@
+"""从筛选后的错题中均匀随机抽取若干道，不使用 ORDER BY random()。
+
+ORDER BY random() LIMIT n 需要读取每一行完整数据（包括题干、答案）再排序。
+这里先只取符合条件的错题 id：查询经以 (user_id, is_deleted) 开头的复合索引定位，
+id 即 rowid，包含在每个索引中。过滤条件都在所用索引内时只扫描索引；出卷时的难度、
+科目等条件不在索引中，需要按 rowid 回表判断，但不排序、也不返回题干等大字段。
+id 列表在数据库内用 group_concat 拼成一个字符串返回，避免逐行构造结果对象。
+再用稀疏的部分 Fisher-Yates 洗牌选出 n 个 id（O(n)，不复制候选列表），最后按主键加载这 n 行。
+
+候选 id 按 (用户, 查询条件) 缓存在进程内，以该用户错题的最大 change_seq 作为版本：
+任何错题的新增、修改、删除都会推进 change_seq（见 services/changes.py），
+读取版本是索引上的一次查找，未变化时直接复用缓存；标签关联的变化不一定推进版本，
+所以条目另有较短的过期时间。
+
+传入 seed 时抽取结果可复现：候选 id 已排序，与索引的扫描顺序无关；
+洗牌的前 k 个结果不随 k 变化，同一个 seed 下可以按 offset 继续取后面的题目。
+"""
+from __future__ import annotations
+
+import random
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select
+
+from ..config import Config
+from ..models import db, Question
+
+
+class CandidateCache:
+    """候选 id 的 LRU 缓存，条目带版本号与过期时间。"""
+
+    def __init__(self, max_size: int = 64, ttl: int = 60):
+        self.max_size = max(int(max_size), 1)
+        self.ttl = max(int(ttl), 1)
+        self._entries: "OrderedDict[tuple, Tuple[object, float, array]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple, version) -> Optional[array]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version or now >= entry[1]:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key: tuple, version, ids: array) -> None:
+        with self._lock:
+            self._entries[key] = (version, time.time() + self.ttl, ids)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+candidate_cache = CandidateCache(Config.SAMPLING_CACHE_SIZE, Config.SAMPLING_CACHE_TTL_SECONDS)
+_system_random = random.SystemRandom()
+
+
+def new_seed() -> int:
+    """生成一个新的随机种子，返回给客户端用于复现或翻页。"""
+    return _system_random.randrange(1 << 31)
+
+
+def parse_seed(value) -> Optional[int]:
+    """解析 seed 参数：空值返回 None，不是非负整数时抛出 ValueError。"""
+    if value in (None, ""):
+        return None
+    try:
+        seed = int(value)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("seed 参数无效") from exc
+    if seed < 0:
+        raise ValueError("seed 参数无效")
+    return seed
+
+
+def version_statement(user_id: int):
+    """用户错题的最大变更序号，经 (user_id, change_seq) 索引一次查找得到。"""
+    return select(func.max(Question.change_seq)).where(Question.user_id == user_id)
+
+
+def ids_statement(id_select):
+    """把只选 id 的查询包装成 group_concat，一行返回全部候选 id。"""
+    sub = id_select.subquery()
+    return select(func.group_concat(sub.c.id))
+
+
+def candidate_ids(query, user_id: int) -> Sequence[int]:
+    """查询命中的全部错题 id（升序），忽略查询上的排序、分页和预加载；结果不可修改。"""
+    id_select = query.with_entities(Question.id).order_by(None).limit(None).offset(None).statement
+    compiled = id_select.compile(dialect=db.engine.dialect)
+    key = (user_id, str(compiled), tuple(sorted(compiled.params.items())))
+    version = db.session.execute(version_statement(user_id)).scalar()
+    ids = candidate_cache.get(key, version)
+    if ids is None:
+        joined = db.session.execute(ids_statement(id_select)).scalar()
+        ids = array("q", sorted(set(map(int, joined.split(","))))) if joined else array("q")
+        candidate_cache.put(key, version, ids)
+    return ids
+
+
+def pick(ids: Sequence[int], k: int, seed: Optional[int] = None) -> List[int]:
+    """不放回地均匀抽取 k 个 id，顺序即抽取顺序；不修改 ids。
+
+    部分 Fisher-Yates 只记录被交换过的位置，成本 O(k)；seed 相同时前 k 个结果
+    与更大的 k 的前缀一致。
+    """
+    rnd = random.Random(seed)
+    n = len(ids)
+    swapped: Dict[int, int] = {}
+    picked = []
+    for i in range(min(k, n)):
+        j = rnd.randrange(i, n)
+        picked.append(swapped.get(j, ids[j]))
+        swapped[j] = swapped.get(i, ids[i])
+    return picked
+
+
+def load_in_order(query, ids: Sequence[int], options=()) -> List[Question]:
+    """按主键加载错题，并保持 ids 中的顺序；缓存过期期间已不符合条件的错题会被跳过。"""
+    if not ids:
+        return []
+    rows = query.options(*options).filter(Question.id.in_(ids)).order_by(None).all()
+    by_id = {row.id: row for row in rows}
+    return [by_id[qid] for qid in ids if qid in by_id]
+
+
+def sample(query, user_id: int, k: int, seed: Optional[int] = None, offset: int = 0, options=()) -> List[Question]:
+    """随机抽取 k 道错题（跳过同一 seed 下的前 offset 道），顺序即抽取顺序。"""
+    picked = pick(candidate_ids(query, user_id), offset + k, seed)[offset:]
+    return load_in_order(query, picked, options)
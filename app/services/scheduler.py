@@ -0,0 +1,156 @@
+"""间隔重复调度：根据每道错题的复习记录计算下次复习时间。
+
+调度算法可以替换，通过 Config.REVIEW_SCHEDULER 选择：
+
+- sm2：经典 SM-2，维护易度因子 ease 与连续答对次数 reps，间隔按 ease 倍增；
+- fsrs：FSRS（v4 默认参数）风格的记忆模型，维护记忆稳定性 stability 与难度 difficulty，
+  按目标记忆保持率 Config.REVIEW_TARGET_RETENTION 计算间隔。
+
+算法状态以 JSON 保存在 questions.review_state 中，每种算法只读写自己的字段，
+切换算法后缺少的字段按首次复习处理。复习结果映射为评分：
+forgot -> 1（忘记）、hard -> 2（困难）、mastered -> 3（记住）。
+hard 的错题仍为待复习的重点题，两种算法都不让它的间隔增长：
+SM-2 回到 1 天，FSRS 的间隔不超过距上次复习的天数。
+"""
+from __future__ import annotations
+
+import math
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from ..config import Config
+
+RATINGS = {"forgot": 1, "hard": 2, "mastered": 3}
+
+
+class Scheduler(ABC):
+    """调度算法接口：输入当前状态与评分，返回新状态和间隔天数（整数）。
+
+    子类必须实现 schedule()，否则实例化时即报错。
+    """
+
+    name = ""
+
+    @abstractmethod
+    def schedule(
+        self,
+        state: Dict[str, Any],
+        rating: int,
+        now: datetime,
+        last_review_at: Optional[datetime],
+    ) -> Tuple[Dict[str, Any], int]:
+        """返回 (新的算法状态, 间隔天数)；last_review_at 为上一次复习时间，首次复习为 None。"""
+
+
+class SM2Scheduler(Scheduler):
+    """SM-2：评分 < 3 视为遗忘，重新从 1 天开始；否则 1 天、6 天、之后按 ease 倍增。
+
+    hard 映射为质量分 3，但不按通过处理：间隔回到 1 天、reps 回到 1（下次记住时为 6 天），
+    ease 照常下降，不计入 lapses；连续 hard 一直停留在 1 天。
+    """
+
+    name = "sm2"
+    # 评分到 SM-2 质量分（0-5）的映射
+    QUALITY = {1: 1, 2: 3, 3: 4, 4: 5}
+
+    def schedule(self, state, rating, now, last_review_at):
+        ease = float(state.get("ease", 2.5))
+        reps = int(state.get("reps", 0))
+        interval = int(state.get("interval", 0))
+        lapses = int(state.get("lapses", 0))
+        quality = self.QUALITY[rating]
+
+        if quality < 3:
+            reps, interval, lapses = 0, 1, lapses + 1
+        elif rating == RATINGS["hard"]:
+            reps, interval = 1, 1
+        else:
+            if reps == 0:
+                interval = 1
+            elif reps == 1:
+                interval = 6
+            else:
+                interval = round(interval * ease)
+            reps += 1
+        ease = max(1.3, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        state = {**state, "ease": round(ease, 4), "reps": reps, "interval": interval, "lapses": lapses}
+        return state, interval
+
+
+class FSRSScheduler(Scheduler):
+    """FSRS v4 风格：记忆稳定性 S 为保持率降到 90% 所需的天数，难度 D 取值 1-10。"""
+
+    name = "fsrs"
+    W = (0.4, 0.6, 2.4, 5.8, 4.93, 0.94, 0.86, 0.01, 1.49, 0.14, 0.94, 2.18, 0.05, 0.34, 1.26, 0.29, 2.61)
+
+    def _initial_difficulty(self, rating: int) -> float:
+        return min(max(self.W[4] - (rating - 3) * self.W[5], 1.0), 10.0)
+
+    def schedule(self, state, rating, now, last_review_at):
+        w = self.W
+        stability = state.get("stability")
+        difficulty = state.get("difficulty")
+        lapses = int(state.get("lapses", 0))
+        elapsed = max((now - last_review_at).total_seconds() / 86400, 0.0) if last_review_at else 0.0
+        if stability is None or difficulty is None:
+            stability = w[rating - 1]
+            difficulty = self._initial_difficulty(rating)
+        else:
+            stability, difficulty = float(stability), float(difficulty)
+            retrievability = (1 + elapsed / (9 * stability)) ** -1
+            if rating == 1:
+                stability = (
+                    w[11] * difficulty ** -w[12] * ((stability + 1) ** w[13] - 1) * math.exp(w[14] * (1 - retrievability))
+                )
+            else:
+                hard_penalty = w[15] if rating == 2 else 1.0
+                easy_bonus = w[16] if rating == 4 else 1.0
+                stability *= 1 + (
+                    math.exp(w[8]) * (11 - difficulty) * stability ** -w[9]
+                    * (math.exp(w[10] * (1 - retrievability)) - 1) * hard_penalty * easy_bonus
+                )
+            difficulty = difficulty - w[6] * (rating - 3)
+            # 均值回归，避免难度长期停留在极端值
+            difficulty = w[7] * self._initial_difficulty(3) + (1 - w[7]) * difficulty
+            difficulty = min(max(difficulty, 1.0), 10.0)
+        if rating == 1:
+            lapses += 1
+
+        retention = Config.REVIEW_TARGET_RETENTION
+        interval = max(1, round(9 * stability * (1 / retention - 1)))
+        if rating == RATINGS["hard"]:
+            # 稳定性照常更新，但间隔不超过距上次复习的天数
+            interval = max(1, min(interval, round(elapsed)))
+        state = {
+            **state,
+            "stability": round(stability, 4),
+            "difficulty": round(difficulty, 4),
+            "lapses": lapses,
+        }
+        return state, interval
+
+
+SCHEDULERS: Dict[str, Scheduler] = {s.name: s for s in (SM2Scheduler(), FSRSScheduler())}
+
+
+def get_scheduler(name: Optional[str] = None) -> Scheduler:
+    name = name or Config.REVIEW_SCHEDULER
+    if name not in SCHEDULERS:
+        raise ValueError(f"未知的复习调度算法：{name}")
+    return SCHEDULERS[name]
+
+
+def schedule_review(question, result: str, now: datetime, scheduler: Optional[Scheduler] = None) -> int:
+    """按复习结果更新错题的 review_state 与 next_review_at，返回间隔天数。
+
+    需要在修改 last_review_at 之前调用，FSRS 用上次复习时间计算记忆保持率。
+    """
+    scheduler = scheduler or get_scheduler()
+    state, interval = scheduler.schedule(
+        dict(question.review_state or {}), RATINGS[result], now, question.last_review_at
+    )
+    interval = min(interval, Config.REVIEW_MAX_INTERVAL_DAYS)
+    question.review_state = state
+    question.next_review_at = now + timedelta(days=interval)
+    return interval
@@ -0,0 +1,209 @@
+"""错题全文检索：基于 SQLite FTS5 的倒排索引。
+
+中文没有空格分词，写入索引前先把连续的汉字切成重叠的二元组（"二次函数" ->
+"二次 次函 函数"），英文/数字按单词保留，再交给 FTS5 的 unicode61 分词器。
+查询时对关键词做同样的切分并组成短语查询，因此任意长度 >= 2 的中文子串都能命中。
+单个汉字等无法构成二元组的关键词返回 None，由调用方退回 LIKE 查询。
+
+索引与 questions 表在同一事务中同步：session flush 后，对标题、内容、答案、
+错因、删除状态或标签发生变化的错题重新写入索引（软删除即从索引移除）。
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+import weakref
+from typing import Iterable, List, Optional, Set
+
+from sqlalchemy import Float, Integer, event, inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from ..config import Config
+
+FTS_TABLE = "questions_fts"
+# 这些属性（含标签集合）变化时需要重建索引行
+INDEXED_FIELDS = ("title", "content", "answer", "error_reason", "is_deleted", "user_id", "tags")
+
+_CJK_RANGES = "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_TOKEN_RE = re.compile(rf"[{_CJK_RANGES}]+|[0-9a-z]+")
+_CJK_RE = re.compile(rf"[{_CJK_RANGES}]")
+# 已确认建有索引表的数据库引擎，之后不再查询 sqlite_master
+_available_engines: "weakref.WeakSet[Engine]" = weakref.WeakSet()
+
+
+def tokenize(value: Optional[str]) -> List[str]:
+    """把文本切成索引用的词元：汉字二元组 + 英文/数字单词。"""
+    normalized = unicodedata.normalize("NFKC", value or "").lower()
+    tokens: List[str] = []
+    for run in _TOKEN_RE.findall(normalized):
+        if _CJK_RE.match(run) and len(run) > 1:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def build_match_query(keyword: str) -> Optional[str]:
+    """把用户输入的关键词转换为 FTS5 MATCH 表达式，多个关键词之间为 AND。
+
+    无法使用索引（例如只有一个汉字）时返回 None。
+    """
+    phrases = []
+    for term in (keyword or "").split():
+        tokens = tokenize(term)
+        if not tokens:
+            continue
+        if any(len(token) == 1 and _CJK_RE.match(token) for token in tokens):
+            return None
+        if len(tokens) == 1 and not _CJK_RE.match(tokens[0]):
+            # 英文/数字单词按前缀匹配，贴近原来 LIKE 的子串语义
+            phrases.append(f'"{tokens[0]}"*')
+        else:
+            phrases.append('"' + " ".join(tokens) + '"')
+    return " AND ".join(phrases) if phrases else None
+
+
+def is_available(bind) -> bool:
+    """当前数据库是否启用了全文索引（SQLite 且已执行建表迁移）。
+
+    每个引擎确认建表后缓存结果，写入监听和关键词查询不再每次查询 sqlite_master。
+    """
+    if not Config.FULLTEXT_SEARCH or bind.dialect.name != "sqlite":
+        return False
+    engine = bind if isinstance(bind, Engine) else bind.engine
+    if engine in _available_engines:
+        return True
+    sql = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?"
+    if isinstance(bind, Engine):
+        with bind.connect() as conn:
+            available = conn.exec_driver_sql(sql, (FTS_TABLE,)).first() is not None
+    else:
+        available = bind.exec_driver_sql(sql, (FTS_TABLE,)).first() is not None
+    if available:
+        _available_engines.add(engine)
+    return available
+
+
+def create_index(engine: Engine) -> bool:
+    """创建 FTS5 虚拟表，已存在时跳过。rowid 即 questions.id。"""
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.begin() as conn:
+        exists = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+        ).first()
+        if exists:
+            return False
+        conn.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            "user_id UNINDEXED, title, content, answer, error_reason, tags, "
+            "tokenize = 'unicode61')"
+        )
+    return True
+
+
+def reindex_questions(conn: Connection, question_ids: Iterable[int]) -> None:
+    """按数据库中的最新数据重写指定错题的索引行，已删除的错题从索引中移除。"""
+    ids = sorted({int(qid) for qid in question_ids if qid})
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        placeholders = ", ".join("?" for _ in chunk)
+        rows = conn.exec_driver_sql(
+            "SELECT q.id, q.user_id, q.title, q.content, q.answer, q.error_reason, "
+            "(SELECT group_concat(t.name, ' ') FROM question_tags t WHERE t.question_id = q.id) "
+            f"FROM questions q WHERE q.is_deleted = 0 AND q.id IN ({placeholders})",
+            tuple(chunk),
+        ).all()
+        conn.exec_driver_sql(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", tuple(chunk))
+        if rows:
+            conn.exec_driver_sql(
+                f"INSERT INTO {FTS_TABLE} (rowid, user_id, title, content, answer, error_reason, tags) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (row[0], row[1], *(" ".join(tokenize(value)) for value in row[2:]))
+                    for row in rows
+                ],
+            )
+
+
+def rebuild_index(engine: Engine, batch_size: int = 1000) -> int:
+    """按主键分批重建全部索引行，每批一个短事务，返回处理的错题数。"""
+    last_id = 0
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            ids = [
+                row[0]
+                for row in conn.exec_driver_sql(
+                    "SELECT id FROM questions WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size)
+                )
+            ]
+            if not ids:
+                return total
+            reindex_questions(conn, ids)
+        last_id = ids[-1]
+        total += len(ids)
+
+
+def match_subquery(keyword: str, user_id: int):
+    """返回命中关键词的 (question_id, rank) 子查询，无法走索引时返回 None。
+
+    rank 为 bm25 得分，越小越相关。使用 MATERIALIZED CTE，保证 MATCH 只执行一次，
+    再按主键回表，而不是对 questions 的每一行做一次关联查询。
+    """
+    match = build_match_query(keyword)
+    if match is None:
+        return None
+    return (
+        text(
+            f"SELECT rowid AS question_id, bm25({FTS_TABLE}) AS rank FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH :match AND user_id = :user_id"
+        )
+        .bindparams(match=match, user_id=user_id)
+        .columns(question_id=Integer, rank=Float)
+        .cte("fts_match")
+        .prefix_with("MATERIALIZED")
+    )
+
+
+def _changed_question_ids(session: Session) -> Set[int]:
+    from ..models import Question, QuestionTag
+
+    ids: Set[int] = set()
+    for obj in session.new:
+        if isinstance(obj, Question):
+            ids.add(obj.id)
+        elif isinstance(obj, QuestionTag):
+            ids.add(obj.question_id)
+    for obj in session.dirty:
+        if isinstance(obj, Question):
+            state = inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in INDEXED_FIELDS):
+                ids.add(obj.id)
+        elif isinstance(obj, QuestionTag):
+            ids.add(obj.question_id)
+            # 标签被移到其他错题时，原错题也需要重建
+            ids.update(qid for qid in inspect(obj).attrs.question_id.history.deleted or () if qid)
+    for obj in session.deleted:
+        if isinstance(obj, Question):
+            ids.add(obj.id)
+        elif isinstance(obj, QuestionTag):
+            ids.add(obj.question_id)
+    ids.discard(None)
+    return ids
+
+
+def _sync_after_flush(session: Session, flush_context) -> None:
+    ids = _changed_question_ids(session)
+    if not ids:
+        return
+    conn = session.connection()
+    if is_available(conn):
+        reindex_questions(conn, ids)
+
+
+def init_search() -> None:
+    """注册 flush 监听，使索引与错题数据保持同步。"""
+    if not event.contains(Session, "after_flush", _sync_after_flush):
+        event.listen(Session, "after_flush", _sync_after_flush)
@@ -0,0 +1,134 @@
+"""标签字典：名称解析、按标签过滤以及 question_count 计数维护。
+
+计数在写入时维护：session flush 后，对关联发生增删的标签以及删除状态发生变化的
+错题所引用的标签，按 question_tags(tag_id, question_id) 索引重新统计。
+读取标签列表时直接使用计数列，不需要扫描错题。
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import event, false, inspect
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from ..models import db, Question, QuestionTag, Tag
+
+
+def clean_tag_names(names: Optional[Iterable[str]]) -> List[str]:
+    """去掉空白和重复的标签名，保持原有顺序。"""
+    cleaned: List[str] = []
+    for name in names or []:
+        if not isinstance(name, str):
+            continue
+        name = name.strip()[:50]
+        if name and name not in cleaned:
+            cleaned.append(name)
+    return cleaned
+
+
+def resolve_tags(user_id: int, names: List[str]) -> Dict[str, Tag]:
+    """返回名称到 Tag 的映射，不存在的标签自动创建（并发创建同名标签时不会冲突）。"""
+    if not names:
+        return {}
+    with db.session.no_autoflush:
+        found = {
+            tag.name: tag
+            for tag in Tag.query.filter(Tag.user_id == user_id, Tag.name.in_(names)).all()
+        }
+        missing = [name for name in names if name not in found]
+        if missing:
+            db.session.execute(
+                sqlite_insert(Tag)
+                .values([{"user_id": user_id, "name": name, "question_count": 0} for name in missing])
+                .on_conflict_do_nothing(index_elements=["user_id", "name"])
+            )
+            found.update(
+                (tag.name, tag)
+                for tag in Tag.query.filter(Tag.user_id == user_id, Tag.name.in_(missing)).all()
+            )
+    return found
+
+
+def resolve_tag_ids(conn: Connection, user_id: int, names: Iterable[str]) -> Dict[str, int]:
+    """resolve_tags 的 Core 版本，供批量写入使用，返回名称到标签 id 的映射。"""
+    names = sorted(set(names))
+    if not names:
+        return {}
+    table = Tag.__table__
+    conn.execute(
+        sqlite_insert(table)
+        .values([{"user_id": user_id, "name": name, "question_count": 0} for name in names])
+        .on_conflict_do_nothing(index_elements=["user_id", "name"])
+    )
+    rows = conn.execute(
+        table.select().with_only_columns(table.c.name, table.c.id)
+        .where(table.c.user_id == user_id, table.c.name.in_(names))
+    )
+    return {name: tag_id for name, tag_id in rows}
+
+
+def filter_by_tag(query, user_id: int, name: str):
+    """只保留带有指定标签的错题，经由 (tag_id, question_id) 索引连接。"""
+    tag = Tag.query.filter_by(user_id=user_id, name=name.strip()).first()
+    if tag is None:
+        return query.filter(false())
+    return query.join(QuestionTag, QuestionTag.question_id == Question.id).filter(QuestionTag.tag_id == tag.id)
+
+
+def refresh_counts(conn: Connection, tag_ids: Iterable[int]) -> None:
+    """重新统计指定标签的未删除错题数。"""
+    ids = sorted({int(tid) for tid in tag_ids if tid})
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        placeholders = ", ".join("?" for _ in chunk)
+        conn.exec_driver_sql(
+            "UPDATE tags SET question_count = ("
+            "SELECT COUNT(DISTINCT qt.question_id) FROM question_tags qt "
+            "JOIN questions q ON q.id = qt.question_id "
+            "WHERE qt.tag_id = tags.id AND q.is_deleted = 0) "
+            f"WHERE id IN ({placeholders})",
+            tuple(chunk),
+        )
+
+
+def _changed_tag_ids(session: Session) -> Set[int]:
+    tag_ids: Set[int] = set()
+    question_ids: Set[int] = set()
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, QuestionTag):
+            tag_ids.add(obj.tag_id)
+        elif isinstance(obj, Question) and obj in session.deleted:
+            question_ids.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, QuestionTag):
+            tag_ids.add(obj.tag_id)
+            tag_ids.update(inspect(obj).attrs.tag_id.history.deleted or ())
+        elif isinstance(obj, Question):
+            attrs = inspect(obj).attrs
+            history = attrs.tags.history
+            tag_ids.update(link.tag_id for link in [*(history.added or ()), *(history.deleted or ())])
+            if attrs.is_deleted.history.has_changes():
+                question_ids.add(obj.id)
+    if question_ids:
+        tag_ids.update(
+            row[0]
+            for row in session.query(QuestionTag.tag_id)
+            .filter(QuestionTag.question_id.in_(question_ids))
+            .all()
+        )
+    tag_ids.discard(None)
+    return tag_ids
+
+
+def _sync_after_flush(session: Session, flush_context) -> None:
+    tag_ids = _changed_tag_ids(session)
+    if tag_ids:
+        refresh_counts(session.connection(), tag_ids)
+
+
+def init_tag_counters() -> None:
+    """注册 flush 监听，维护 tags.question_count。"""
+    if not event.contains(Session, "after_flush", _sync_after_flush):
+        event.listen(Session, "after_flush", _sync_after_flush)
@@ -0,0 +1,92 @@
+"""已验证 token 的进程内缓存（LRU + 过期时间）。"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from ..config import Config
+
+
+@dataclass(frozen=True)
+class TokenPrincipal:
+    """token 校验通过后得到的轻量身份信息，只包含 JWT 中的声明。"""
+
+    user_id: int
+    expires_at: int  # JWT exp（Unix 时间戳）
+    issued_at: float = 0  # JWT iat（Unix 时间戳，可带小数）
+
+
+class TokenCache:
+    """
+    缓存已经验证过签名的 token，避免每个请求都重复 jwt.decode。
+
+    - 容量有限，超出后按 LRU 淘汰
+    - 条目在 JWT exp 与 ttl 两者中较早的时间点过期
+    - 用户资料或密码变更时可以按用户清除
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: int = 300):
+        self.max_size = max(int(max_size), 1)
+        self.ttl = max(int(ttl), 1)
+        self._entries: "OrderedDict[str, tuple[TokenPrincipal, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[TokenPrincipal]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            principal, valid_until = entry
+            if now >= valid_until:
+                del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return principal
+
+    def put(self, token: str, principal: TokenPrincipal) -> None:
+        valid_until = min(float(principal.expires_at), time.time() + self.ttl)
+        with self._lock:
+            self._entries[token] = (principal, valid_until)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int) -> int:
+        """清除某个用户的全部缓存条目，返回清除数量。"""
+        with self._lock:
+            stale = [
+                token
+                for token, (principal, _) in self._entries.items()
+                if principal.user_id == user_id
+            ]
+            for token in stale:
+                del self._entries[token]
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# 全局缓存实例，供认证中间件与用户模型共用
+token_cache = TokenCache(Config.TOKEN_CACHE_SIZE, Config.TOKEN_CACHE_TTL_SECONDS)
@@ -0,0 +1,35 @@
+"""ETag 与条件 GET：先用轻量的版本查询生成 ETag，If-None-Match 命中时直接返回 304。"""
+import hashlib
+from typing import Any
+
+from flask import current_app, request
+
+
+def make_etag(*parts: Any) -> str:
+    """把版本信息摘要成 ETag 值（不含引号和 W/ 前缀）。"""
+    raw = "\x1f".join("" if part is None else str(part) for part in parts)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def request_signature() -> str:
+    """当前请求的查询参数（排序后），同一资源不同参数的表示需要不同的 ETag。"""
+    return "&".join(f"{key}={value}" for key, value in sorted(request.args.items(multi=True)))
+
+
+def not_modified(etag: str, weak: bool = False):
+    """客户端缓存仍然有效时返回 304 响应，否则返回 None。
+
+    If-None-Match 按 RFC 7232 使用弱比较，强/弱 ETag 都可以命中。
+    """
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = current_app.response_class(status=304)
+    return with_etag(response, etag, weak)
+
+
+def with_etag(response, etag: str, weak: bool = False):
+    """给响应加上 ETag，并要求客户端每次使用前重新验证。"""
+    response.set_etag(etag, weak=weak)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
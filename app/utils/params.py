@@ -0,0 +1,10 @@
+"""请求参数解析的公共函数。"""
+from typing import Any
+
+
+def to_int(value: Any, default: int = 0) -> int:
+    """把查询参数或 JSON 字段转换为整数，无法转换时返回 default。"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
@@ -0,0 +1,146 @@
+"""按请求统计 SQL 次数与耗时，识别疑似 N+1 查询。"""
+from __future__ import annotations
+
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Tuple
+
+from flask import Flask, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("app.sql")
+
+# 当前上下文中正在收集的统计对象（支持嵌套，例如请求内再使用 track_queries）
+_collectors: ContextVar[Tuple["QueryStats", ...]] = ContextVar("sql_query_collectors", default=())
+
+
+class QueryStats:
+    """一段代码执行期间的 SQL 统计。"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total_time += elapsed
+        # 语句本身是带占位符的 SQL，相同形状只是参数不同
+        self.shapes[" ".join(statement.split())] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """执行次数达到 threshold 的语句形状，即 N+1 候选。"""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """统计 with 块内执行的 SQL。"""
+    stats = QueryStats()
+    token = _collectors.set(_collectors.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _collectors.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int, n_plus_one_threshold: int = 0) -> Iterator[QueryStats]:
+    """测试辅助：with 块内 SQL 次数超过 limit 时抛出 AssertionError。
+
+    例如::
+
+        with assert_max_queries(4):
+            client.get("/api/questions?page_size=50", headers=headers)
+
+    n_plus_one_threshold 大于 0 时，同一语句形状重复达到该次数也视为失败。
+    """
+    with track_queries() as stats:
+        yield stats
+    problems = []
+    if stats.count > limit:
+        problems.append(f"执行了 {stats.count} 条 SQL，预算为 {limit}")
+    if n_plus_one_threshold:
+        for shape, n in stats.repeated(n_plus_one_threshold):
+            problems.append(f"疑似 N+1（{n} 次）: {shape[:200]}")
+    if problems:
+        raise AssertionError("；".join(problems))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _collectors.get():
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    collectors = _collectors.get()
+    if not collectors:
+        return
+    starts = conn.info.get("query_start_time")
+    elapsed = time.perf_counter() - starts.pop() if starts else 0.0
+    for stats in collectors:
+        stats.record(statement, elapsed)
+
+
+def init_query_profiler(app: Flask, engine: Engine) -> None:
+    """为 engine 注册 SQL 计数监听，并在每个 /api 请求结束时输出统计。
+
+    - SQL_PROFILE_HEADERS（默认跟随 debug）：写入 X-DB-Query-Count、
+      X-DB-Query-Time-Ms、X-DB-N-Plus-One 响应头
+    - 其余情况写入 app.sql 日志：超出 SQL_QUERY_BUDGET 或出现 N+1 候选时为 WARNING
+    """
+    if not app.config.get("SQL_PROFILING", True):
+        return
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    threshold = app.config.get("SQL_N_PLUS_ONE_THRESHOLD", 5)
+    budget = app.config.get("SQL_QUERY_BUDGET", 20)
+
+    @app.before_request
+    def _start_query_stats():
+        if request.path.startswith("/api/"):
+            stats = QueryStats()
+            g._query_stats = stats
+            g._query_stats_token = _collectors.set(_collectors.get() + (stats,))
+
+    @app.after_request
+    def _report_query_stats(response):
+        stats = g.pop("_query_stats", None)
+        if stats is None:
+            return response
+
+        repeated = stats.repeated(threshold)
+        elapsed_ms = round(stats.total_time * 1000, 2)
+        show_headers = app.config.get("SQL_PROFILE_HEADERS")
+        if show_headers is None:
+            show_headers = app.debug
+        if show_headers:
+            response.headers["X-DB-Query-Count"] = str(stats.count)
+            response.headers["X-DB-Query-Time-Ms"] = str(elapsed_ms)
+            response.headers["X-DB-N-Plus-One"] = str(len(repeated))
+
+        summary: Dict[str, object] = {
+            "endpoint": request.endpoint,
+            "method": request.method,
+            "queries": stats.count,
+            "db_ms": elapsed_ms,
+        }
+        if repeated or stats.count > budget:
+            details = "; ".join(f"{n}x {shape[:120]}" for shape, n in repeated)
+            logger.warning("sql %s n_plus_one=[%s]", summary, details)
+        else:
+            logger.debug("sql %s", summary)
+        return response
+
+    @app.teardown_request
+    def _stop_query_stats(exc=None):
+        # 放在 teardown 中，视图抛出异常时也能恢复上下文
+        token = g.pop("_query_stats_token", None)
+        if token is not None:
+            _collectors.reset(token)
@@ -108,6 +108,19 @@ class Response:
         """
         return Response.error(code=409, message=message, data=data, status_code=409)
     
+    @staticmethod
+    def too_many_requests(message: str = "请求过于频繁，请稍后重试", data: Any = None) -> Any:
+        """429错误 - 请求过于频繁
+        
+        Args:
+            message: 错误消息
+            data: 响应数据
+            
+        Returns:
+            Flask响应对象
+        """
+        return Response.error(code=429, message=message, data=data, status_code=429)
+    
     @staticmethod
     def internal_server_error(message: str = "服务器内部错误", data: Any = None) -> Any:
         """500错误 - 服务器内部错误
@@ -0,0 +1,48 @@
+"""SQLite 连接级配置。"""
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: Optional[Dict[str, Any]]) -> None:
+    """在 engine 的每个新连接上执行给定的 PRAGMA，非 SQLite 引擎直接忽略。
+
+    Args:
+        engine: SQLAlchemy 引擎
+        pragmas: PRAGMA 名称到取值的映射，按顺序执行
+    """
+    if not pragmas or engine.dialect.name != "sqlite":
+        return
+
+    statements = [f"PRAGMA {name}={value}" for name, value in pragmas.items()]
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+
+def explain_query_plan(session, statement) -> List[str]:
+    """返回 SQLite 对给定查询的 EXPLAIN QUERY PLAN 结果（每步一行）。
+
+    Args:
+        session: SQLAlchemy Session（如 db.session）
+        statement: ORM Query 或 Core Select
+    """
+    if hasattr(statement, "statement"):
+        statement = statement.statement
+    bind = session.get_bind()
+    compiled = statement.compile(dialect=bind.dialect, compile_kwargs={"render_postcompile": True})
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    return [row[-1] for row in rows]
+
+
+def is_full_scan(plan: List[str], table: str) -> bool:
+    """查询计划中是否存在对 table 的全表扫描（未使用任何索引）。"""
+    return any(step.strip() == f"SCAN {table}" for step in plan)
@@ -0,0 +1,91 @@
+"""近似重复检测基准：指纹计算、单次查找耗时与全量查找重复簇的耗时。
+
+生成一个拥有 N 道错题的用户，其中约 5% 是在已有错题上改动几个字的近似重复，
+计算全部指纹后测量创建错题时的单次查找耗时（应与 N 无关）和查找全部重复簇的耗时
+（应随 N 近似线性增长）。
+
+用法（在项目根目录执行）::
+
+    python -m benchmarks.bench_duplicates --questions 20000 100000
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from app import create_app
+from app.config import Config
+from app.models import db, Question, User
+from app.services import duplicates
+from benchmarks.bench_search import CHARS
+
+
+def _seed(count: int, rnd: random.Random) -> list:
+    db.session.execute(User.__table__.insert(), [{"id": 1, "username": "bench", "password_hash": "x"}])
+    texts = []
+    for i in range(count):
+        if texts and rnd.random() < 0.05:
+            base = rnd.choice(texts)
+            pos = rnd.randrange(len(base))
+            text = base[:pos] + rnd.choice(CHARS) + base[pos + 1:]
+        else:
+            text = "".join(rnd.choice(CHARS) for _ in range(60))
+        texts.append(text)
+    for start in range(0, count, 5000):
+        db.session.execute(
+            Question.__table__.insert(),
+            [
+                {"user_id": 1, "title": f"题目{i}", "content": texts[i], "question_type": "essay",
+                 "difficulty": 2, "review_status": 0, "review_count": 0, "is_important": False,
+                 "is_mastered": False, "is_deleted": False}
+                for i in range(start, min(start + 5000, count))
+            ],
+        )
+    db.session.commit()
+    return texts
+
+
+def _run(tmp: Path, count: int, lookups: int) -> None:
+    rnd = random.Random(42)
+    Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp / f'duplicates_{count}.db'}"
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        texts = _seed(count, rnd)
+
+        start = time.perf_counter()
+        with db.engine.begin() as conn:
+            duplicates.fingerprint_questions(conn, range(1, count + 1))
+        fingerprint = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(lookups):
+            duplicates.find_similar(1, "题目", rnd.choice(texts))
+        lookup_ms = (time.perf_counter() - start) / lookups * 1000
+
+        start = time.perf_counter()
+        clusters = duplicates.find_clusters(1)
+        cluster_s = time.perf_counter() - start
+        print(
+            f"{count:>8} rows  fingerprint {fingerprint:6.1f}s  lookup {lookup_ms:6.2f} ms  "
+            f"clusters {cluster_s:6.2f}s ({len(clusters)} clusters)"
+        )
+        db.session.remove()
+        db.engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, nargs="+", default=[20000, 100000])
+    parser.add_argument("--lookups", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.questions:
+            _run(Path(tmp), count, args.lookups)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""批量导入导出基准：速度、首字节时间与内存峰值。
+
+先把 N 道错题（含选项、标签、图片）写入临时 NDJSON 文件，再用临时数据库执行导入，
+然后分别以 ndjson / csv 导出（输出丢弃）。输出耗时、每秒行数和导出首个数据块的耗时；加 --memory 时用 tracemalloc 统计 Python 内存峰值（会明显拖慢导入），
+文件行数翻倍时内存峰值应基本不变。
+
+用法（在项目根目录执行）::
+
+    python -m benchmarks.bench_import --questions 20000 50000
+    python -m benchmarks.bench_import --questions 20000 50000 --memory
+"""
+
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from app import create_app
+from app.config import Config
+from app.migrations import upgrade
+from app.models import db, User
+from app.services import question_io
+
+
+def _write_file(path: Path, count: int) -> None:
+    with path.open("w", encoding="utf-8") as f:
+        for i in range(count):
+            record = {
+                "title": f"导入基准题目 {i}",
+                "question_type": "single_choice",
+                "difficulty": i % 3 + 1,
+                "content": f"已知二次函数 f(x)=x^2-{i}x+1，求最小值。",
+                "answer": "A",
+                "error_reason": "配方出错",
+                "tags": ["函数", f"第{i % 20}章"],
+                "options": [
+                    {"option_key": key, "option_text": f"选项{key}", "is_correct": key == "A"}
+                    for key in "ABCD"
+                ],
+                "images": [f"/static/uploads/questions/{i}.png"],
+            }
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _run(tmp: Path, count: int, batch_size: int, memory: bool) -> None:
+    data_file = tmp / f"questions_{count}.ndjson"
+    _write_file(data_file, count)
+    Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp / f'import_{count}.db'}"
+    app = create_app()
+    with app.app_context():
+        upgrade(db.engine, log=lambda message: None)
+        user = User(username="bench", password_hash="x")
+        db.session.add(user)
+        db.session.commit()
+
+        if memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        with data_file.open("rb") as stream:
+            result = question_io.import_questions(user.id, stream, "ndjson", batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        print(f"{count:>8} rows  import   {elapsed:6.1f}s  {count / elapsed:8.0f} rows/s{_peak(memory)}")
+
+        for fmt in ("ndjson", "csv"):
+            if memory:
+                tracemalloc.start()
+            start = time.perf_counter()
+            first_chunk = None
+            size = 0
+            for chunk in question_io.export_questions(user.id, fmt):
+                if first_chunk is None:
+                    first_chunk = time.perf_counter() - start
+                size += len(chunk)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{count:>8} rows  export {fmt:<6} {elapsed:6.1f}s  first chunk {first_chunk * 1000:6.1f} ms  "
+                f"{size / 1024 / 1024:6.1f} MiB{_peak(memory)}"
+            )
+        db.engine.dispose()
+    if result.failed:
+        print(f"import errors: {result.errors[:3]}")
+
+
+def _peak(memory: bool) -> str:
+    if not memory:
+        return ""
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return f"  peak {peak / 1024 / 1024:6.1f} MiB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, nargs="+", default=[20000, 50000])
+    parser.add_argument("--batch-size", type=int, default=Config.IMPORT_BATCH_SIZE)
+    parser.add_argument("--memory", action="store_true", help="统计内存峰值")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.questions:
+            _run(Path(tmp), count, args.batch_size, args.memory)
+
+
+if __name__ == "__main__":
+    main()
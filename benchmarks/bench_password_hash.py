@@ -0,0 +1,58 @@
+"""密码哈希微基准：统计单核与进程池下每秒可完成的哈希次数。
+
+用法（在项目根目录执行）::
+
+    python -m benchmarks.bench_password_hash --count 64 --workers 4
+"""
+
+import argparse
+import os
+import time
+
+from werkzeug.security import generate_password_hash
+
+from app.config import Config
+from app.services.password_hasher import PasswordHasher
+
+
+def bench_inline(method: str, count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        generate_password_hash(f"password-{i}", method)
+    return count / (time.perf_counter() - start)
+
+
+def bench_pool(method: str, count: int, workers: int) -> float:
+    from concurrent.futures import ThreadPoolExecutor
+
+    hasher = PasswordHasher(method, workers=workers, max_pending=count)
+    hasher.hash("warm-up")  # 预先拉起工作进程，不计入耗时
+    try:
+        start = time.perf_counter()
+        # 用线程模拟并发请求，把任务同时压进进程池
+        with ThreadPoolExecutor(max_workers=workers * 2) as pool:
+            list(pool.map(hasher.hash, (f"password-{i}" for i in range(count))))
+        return count / (time.perf_counter() - start)
+    finally:
+        hasher.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--method", default=Config.PASSWORD_HASH_METHOD)
+    parser.add_argument("--count", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(f"method={args.method} count={args.count} cpus={os.cpu_count()}")
+    inline_rate = bench_inline(args.method, args.count)
+    print(f"inline (1 core):      {inline_rate:8.1f} hashes/sec")
+    pool_rate = bench_pool(args.method, args.count, args.workers)
+    print(
+        f"pool ({args.workers} workers):   {pool_rate:8.1f} hashes/sec, "
+        f"{pool_rate / args.workers:8.1f} hashes/sec per core"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""随机抽题基准：ORDER BY random() LIMIT n 与只读 id 后抽样（services/sampling.py）的耗时对比。
+
+生成一个拥有 N 道错题（题干、答案约 1KB）的用户，按复习中心 mode=random 的条件
+（未删除、待复习）抽取 20 道题，分别测量 ORDER BY random()、抽样（每次清空候选缓存）
+和抽样（命中候选缓存）的平均耗时，并检查相同 seed 的两次抽样结果一致。
+
+用法（在项目根目录执行）::
+
+    python -m benchmarks.bench_sampling --questions 10000 100000
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import func
+
+from app import create_app
+from app.config import Config
+from app.models import db, Question, User
+from app.services import sampling
+
+
+def _seed(count: int, rnd: random.Random) -> None:
+    db.session.execute(User.__table__.insert(), [{"id": 1, "username": "bench", "password_hash": "x"}])
+    body = "x" * 500
+    for start in range(0, count, 5000):
+        db.session.execute(
+            Question.__table__.insert(),
+            [
+                {"user_id": 1, "title": f"题目{i}", "content": body, "answer": body, "question_type": "essay",
+                 "difficulty": 1 + i % 3, "review_status": 0 if rnd.random() < 0.8 else 1, "review_count": 0,
+                 "is_important": False, "is_mastered": False, "is_deleted": i % 50 == 0}
+                for i in range(start, min(start + 5000, count))
+            ],
+        )
+    db.session.commit()
+    db.session.execute(db.text("ANALYZE"))
+
+
+def _timed(fn, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def _run(tmp: Path, count: int, size: int, rounds: int) -> None:
+    Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp / f'sampling_{count}.db'}"
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        _seed(count, random.Random(42))
+        query = Question.query.filter_by(user_id=1, is_deleted=False).filter(Question.review_status == 0)
+        options = Question.load_options("review")
+
+        def order_by_random():
+            query.options(*options).order_by(func.random()).limit(size).all()
+            db.session.expunge_all()
+
+        def sampled():
+            sampling.sample(query, 1, size, options=options)
+            db.session.expunge_all()
+
+        def sampled_uncached():
+            sampling.candidate_cache.clear()
+            sampled()
+
+        random_ms = _timed(order_by_random, rounds)
+        uncached_ms = _timed(sampled_uncached, rounds)
+        cached_ms = _timed(sampled, rounds)
+        seeded = [sampling.pick(sampling.candidate_ids(query, 1), size, seed=7) for _ in range(2)]
+        print(
+            f"{count:>8} rows  ORDER BY random() {random_ms:7.2f} ms  "
+            f"id sampling {uncached_ms:7.2f} ms (cached {cached_ms:6.2f} ms)  "
+            f"seeded repeatable: {seeded[0] == seeded[1]}"
+        )
+        db.session.remove()
+        db.engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--size", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.questions:
+            _run(Path(tmp), count, args.size, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
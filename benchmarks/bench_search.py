@@ -0,0 +1,128 @@
+"""关键词搜索基准：对比 LIKE 全表匹配与 FTS5 全文索引。
+
+生成一个拥有 N 道错题的用户，分别用两种方式执行错题列表的关键词查询
+（总数 + 第一页 10 条，全文索引另测按相关度排序），输出平均耗时。
+
+用法（在项目根目录执行）::
+
+    python -m benchmarks.bench_search --questions 100000
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, func, or_, select
+
+from app.models import db, Question, User
+from app.services import search
+
+# 常用汉字随机组成的文本作为背景，关键词按不同频率混入（约 10% / 1% / 0.1% 的错题）
+CHARS = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区强放决西被干做必战先回则任取据处理府研质"
+KEYWORDS = {"函数": 0.1, "能量守恒": 0.01, "完形填空": 0.001, "grammar": 0.01}
+
+
+def _text(rnd: random.Random, length: int) -> str:
+    text = "".join(rnd.choice(CHARS) for _ in range(length))
+    for keyword, ratio in KEYWORDS.items():
+        if rnd.random() < ratio:
+            pos = rnd.randrange(len(text) + 1)
+            text = f"{text[:pos]}{keyword}{text[pos:]}"
+    return text
+
+
+def _seed(engine, count: int) -> None:
+    rnd = random.Random(42)
+    now = datetime.utcnow()
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [{"id": 1, "username": "bench", "password_hash": "x"}])
+        for start in range(0, count, 5000):
+            conn.execute(
+                Question.__table__.insert(),
+                [
+                    {
+                        "user_id": 1,
+                        "title": "".join(rnd.choice(CHARS) for _ in range(12)),
+                        "content": _text(rnd, 60),
+                        "answer": "".join(rnd.choice(CHARS) for _ in range(10)),
+                        "error_reason": "".join(rnd.choice(CHARS) for _ in range(10)),
+                        "question_type": "essay",
+                        "difficulty": 2,
+                        "review_status": 0,
+                        "review_count": 0,
+                        "is_important": False,
+                        "is_mastered": False,
+                        "is_deleted": False,
+                        "created_at": now - timedelta(seconds=i),
+                        "updated_at": now,
+                    }
+                    for i in range(start, min(start + 5000, count))
+                ],
+            )
+    search.create_index(engine)
+    search.rebuild_index(engine, batch_size=5000)
+
+
+def _like_queries(keyword: str):
+    pattern = f"%{keyword}%"
+    where = (
+        Question.user_id == 1,
+        Question.is_deleted.is_(False),
+        or_(Question.title.ilike(pattern), Question.content.ilike(pattern)),
+    )
+    return (
+        select(func.count()).select_from(Question).where(*where),
+        select(Question.id).where(*where).order_by(Question.created_at.desc()).limit(10),
+    )
+
+
+def _fts_queries(keyword: str, ranked: bool = False):
+    matches = search.match_subquery(keyword, 1)
+    joined = select(Question.id).join(matches, matches.c.question_id == Question.id).where(
+        Question.user_id == 1, Question.is_deleted.is_(False)
+    )
+    return (
+        select(func.count()).select_from(joined.subquery()),
+        joined.order_by(matches.c.rank if ranked else Question.created_at.desc()).limit(10),
+    )
+
+
+def _time(engine, queries, repeat: int):
+    count_sql, page_sql = queries
+    with engine.connect() as conn:
+        total = conn.execute(count_sql).scalar()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            conn.execute(count_sql).scalar()
+            conn.execute(page_sql).all()
+        return total, (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'search.db'}")
+        start = time.perf_counter()
+        _seed(engine, args.questions)
+        print(f"seeded {args.questions} questions + index in {time.perf_counter() - start:.1f}s")
+        for keyword in KEYWORDS:
+            like_total, like_ms = _time(engine, _like_queries(keyword), args.repeat)
+            fts_total, fts_ms = _time(engine, _fts_queries(keyword), args.repeat)
+            _, ranked_ms = _time(engine, _fts_queries(keyword, ranked=True), args.repeat)
+            print(
+                f"{keyword:<8} LIKE {like_ms:8.1f} ms ({like_total} rows)   "
+                f"FTS {fts_ms:8.1f} ms ({fts_total} rows, x{like_ms / max(fts_ms, 1e-6):.1f})   "
+                f"FTS ranked {ranked_ms:8.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""SQLite 并发读写基准：对比默认配置与 Config 中的生产配置。
+
+模拟复习提交（UPDATE）、AI 聊天记录写入（INSERT）与列表查询（SELECT）并发执行，
+分别统计读写吞吐量以及 "database is locked" 错误次数。
+
+用法（在项目根目录执行）::
+
+    python -m benchmarks.bench_sqlite_concurrency --seconds 5 --writers 4 --readers 8
+"""
+
+import argparse
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import OperationalError
+
+from app.config import Config
+from app.models import db, AIChatRecord, Question, User
+from app.utils.sqlite import apply_sqlite_pragmas
+
+SEED_QUESTIONS = 2000
+
+
+def _build_engine(path: Path, profile: bool):
+    uri = f"sqlite:///{path}"
+    if not profile:
+        return create_engine(uri)
+    engine = create_engine(uri, **Config.SQLALCHEMY_ENGINE_OPTIONS)
+    apply_sqlite_pragmas(engine, Config.SQLITE_PRAGMAS)
+    return engine
+
+
+def _seed(engine) -> None:
+    db.metadata.create_all(engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [{"id": 1, "username": "bench", "password_hash": "x"}])
+        conn.execute(
+            Question.__table__.insert(),
+            [
+                {
+                    "user_id": 1,
+                    "title": f"question {i}",
+                    "content": "content",
+                    "question_type": "single_choice",
+                    "difficulty": 1 + i % 3,
+                    "review_status": 0,
+                    "review_count": 0,
+                    "is_important": False,
+                    "is_mastered": False,
+                    "is_deleted": False,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for i in range(SEED_QUESTIONS)
+            ],
+        )
+
+
+def _run(engine, seconds: float, writers: int, readers: int) -> dict:
+    questions = Question.__table__
+    chats = AIChatRecord.__table__
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {"reads": 0, "writes": 0, "locked": 0}
+
+    def bump(key):
+        with lock:
+            stats[key] += 1
+
+    def writer():
+        rnd = random.Random()
+        while not stop.is_set():
+            try:
+                with engine.begin() as conn:
+                    if rnd.random() < 0.5:
+                        conn.execute(
+                            questions.update()
+                            .where(questions.c.id == rnd.randint(1, SEED_QUESTIONS))
+                            .values(review_count=questions.c.review_count + 1, last_review_at=datetime.utcnow())
+                        )
+                    else:
+                        conn.execute(
+                            chats.insert().values(user_id=1, role="user", content="hello", created_at=datetime.utcnow())
+                        )
+                bump("writes")
+            except OperationalError:
+                bump("locked")
+
+    def reader():
+        rnd = random.Random()
+        while not stop.is_set():
+            try:
+                with engine.connect() as conn:
+                    conn.execute(
+                        select(questions.c.id, questions.c.title)
+                        .where(questions.c.user_id == 1, questions.c.difficulty == rnd.randint(1, 3))
+                        .order_by(questions.c.created_at.desc())
+                        .limit(20)
+                    ).all()
+                    conn.execute(select(func.count()).select_from(questions).where(questions.c.review_status == 0)).scalar()
+                bump("reads")
+            except OperationalError:
+                bump("locked")
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return {key: value / seconds if key != "locked" else value for key, value in stats.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, profile in (("default", False), ("production", True)):
+            path = Path(tmp) / f"{label}.db"
+            engine = _build_engine(path, profile)
+            _seed(engine)
+            result = _run(engine, args.seconds, args.writers, args.readers)
+            engine.dispose()
+            print(
+                f"{label:<11} reads/s={result['reads']:9.1f}  writes/s={result['writes']:9.1f}  "
+                f"locked errors={result['locked']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""检查错题更新接口只写入真正变化的行：重复提交相同内容时不产生任何写入。
+
+在临时库（经迁移创建，含全文索引）中注册用户并创建一道带选项、标签和图片的错题，然后用 track_queries 统计：
+
+- 按创建时的内容原样 PUT 一次，不应出现任何 INSERT/UPDATE/DELETE；
+- 只修改一个选项的文本，写入只应涉及该选项（以及错题的 updated_at），
+  不应删除或重建其他选项和标签。
+
+不满足时以非零状态退出。
+
+用法（在项目根目录执行）::
+
+    python -m benchmarks.check_update_writes
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+from app import create_app
+from app.config import Config
+from app.migrations import upgrade
+from app.models import db
+from app.utils.query_profiler import assert_max_queries, track_queries
+
+WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+PAYLOAD = {
+    "title": "二次函数最值",
+    "content": "求 y = x^2 - 4x + 3 在区间 [0, 3] 上的最小值",
+    "answer": "B",
+    "error_reason": "忽略了区间端点",
+    "question_type": "single_choice",
+    "difficulty": 2,
+    "options": [
+        {"option_key": "A", "option_text": "0", "is_correct": False},
+        {"option_key": "B", "option_text": "-1", "is_correct": True},
+        {"option_key": "C", "option_text": "3", "is_correct": False},
+    ],
+    "tags": ["函数", "最值"],
+    "images": ["/static/uploads/a.png"],
+}
+
+
+def _writes(stats):
+    return [(shape, n) for shape, n in stats.shapes.items() if shape.lstrip().upper().startswith(WRITE_PREFIXES)]
+
+
+def _put(client, headers, question_id, payload):
+    response = client.put(f"/api/questions/{question_id}", json=payload, headers=headers)
+    assert response.json["code"] == 0, response.json
+
+
+def main() -> int:
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{Path(tmp) / 'writes.db'}"
+        app = create_app()
+        with app.app_context():
+            # 与 init_db 一样经迁移建库：questions_fts 只由迁移创建，更新时会同步全文索引
+            upgrade(db.engine, log=lambda message: None)
+        client = app.test_client()
+        client.post("/api/auth/register", json={"username": "writer", "password": "123456"})
+        token = client.post("/api/auth/login", json={"username": "writer", "password": "123456"}).json["data"]["token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        question_id = client.post("/api/questions", json=PAYLOAD, headers=headers).json["data"]["id"]
+        # 第一次请求会校验 token 并写入缓存，先预热，使下面只统计更新本身
+        client.get(f"/api/questions/{question_id}", headers=headers)
+
+        # 原样重复提交：读取错题、选项、标签之外不应有任何 SQL 写入
+        with assert_max_queries(6) as stats:
+            _put(client, headers, question_id, PAYLOAD)
+        writes = _writes(stats)
+        failures += bool(writes)
+        print(f"[{'FAIL' if writes else 'ok':>4}] unchanged PUT: {stats.count} queries, {len(writes)} write shapes")
+        for shape, n in writes:
+            print(f"         {n}x {shape[:160]}")
+
+        # 只改一个选项：不应删除任何行，也不应重写标签
+        changed = dict(PAYLOAD, options=[dict(o) for o in PAYLOAD["options"]])
+        changed["options"][2]["option_text"] = "4"
+        with track_queries() as stats:
+            _put(client, headers, question_id, changed)
+        writes = _writes(stats)
+        unexpected = [(shape, n) for shape, n in writes if shape.upper().startswith("DELETE") or "tags" in shape]
+        option_updates = sum(n for shape, n in writes if shape.upper().startswith("UPDATE QUESTION_OPTIONS"))
+        bad = bool(unexpected) or option_updates != 1
+        failures += bad
+        print(f"[{'FAIL' if bad else 'ok':>4}] one option changed: {option_updates} option update(s)")
+        for shape, n in writes:
+            print(f"         {n}x {shape[:160]}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""检查主要查询的 SQLite 执行计划，确认列表/复习/仪表盘/组卷查询都走索引。
+
+在临时库中写入一批数据并 ANALYZE 后，对与路由中相同形状的查询执行
+EXPLAIN QUERY PLAN；出现全表扫描时以非零状态退出。
+
+用法（在项目根目录执行）::
+
+    python -m benchmarks.explain_queries
+"""
+
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.models import db, AIChatRecord, Question, QuestionOption, QuestionTag, ReviewEvent, Subject, User
+from app.services import changes, duplicates, purge, question_io, review_log, sampling
+from app.utils.sqlite import explain_query_plan, is_full_scan
+
+USERS = 20
+QUESTIONS_PER_USER = 500
+
+
+def _seed(session: Session) -> None:
+    now = datetime.utcnow()
+    session.execute(
+        User.__table__.insert(),
+        [{"id": uid, "username": f"user{uid}", "password_hash": "x"} for uid in range(1, USERS + 1)],
+    )
+    session.execute(
+        Subject.__table__.insert(),
+        [
+            {"user_id": uid, "name": f"subject{s}", "color": "#000", "icon": "i", "sort_order": s, "is_deleted": False}
+            for uid in range(1, USERS + 1)
+            for s in range(5)
+        ],
+    )
+    session.execute(
+        Question.__table__.insert(),
+        [
+            {
+                "user_id": uid,
+                "subject_id": (uid - 1) * 5 + i % 5 + 1,
+                "title": f"question {i}",
+                "content": "content",
+                "question_type": "single_choice",
+                "difficulty": 1 + i % 3,
+                "review_status": i % 2,
+                "review_count": 0,
+                "is_important": i % 7 == 0,
+                "is_mastered": False,
+                "mastery_status": ("forgot", "hard", "mastered", None)[i % 4],
+                "is_deleted": i % 50 == 0,
+                "last_review_at": now - timedelta(days=i % 30) if i % 3 else None,
+                "next_review_at": now + timedelta(days=i % 60 - 10),
+                "created_at": now - timedelta(minutes=i),
+                "updated_at": now,
+            }
+            for uid in range(1, USERS + 1)
+            for i in range(QUESTIONS_PER_USER)
+        ],
+    )
+    total = USERS * QUESTIONS_PER_USER
+    session.execute(
+        QuestionTag.__table__.insert(),
+        [{"question_id": qid, "name": f"tag{qid % 10}"} for qid in range(1, total + 1)],
+    )
+    session.execute(
+        QuestionOption.__table__.insert(),
+        [{"question_id": qid, "option_key": "A", "option_text": "a", "is_correct": True, "sort_order": 0} for qid in range(1, total + 1)],
+    )
+    session.execute(
+        ReviewEvent.__table__.insert(),
+        [
+            {
+                "user_id": (qid - 1) // QUESTIONS_PER_USER + 1,
+                "question_id": qid,
+                "result": ("forgot", "hard", "mastered")[(qid + n) % 3],
+                "reviewed_at": now - timedelta(days=(qid + n * 7) % 60),
+            }
+            for qid in range(1, total + 1)
+            for n in range(3)
+        ],
+    )
+    session.execute(
+        AIChatRecord.__table__.insert(),
+        [{"user_id": uid, "role": "user", "content": "hi", "created_at": now} for uid in range(1, USERS + 1) for _ in range(50)],
+    )
+    session.commit()
+    session.connection().exec_driver_sql("ANALYZE")
+
+
+def _queries():
+    user_id = 3
+    now = datetime.utcnow()
+    today = datetime.combine(now.date(), datetime.min.time())
+    base = select(Question).where(Question.user_id == user_id, Question.is_deleted.is_(False))
+    count = select(func.count(Question.id)).where(Question.user_id == user_id, Question.is_deleted.is_(False))
+    return {
+        "questions.list": base.order_by(Question.created_at.desc()).limit(10),
+        "questions.list keyword": base.where(
+            or_(Question.title.ilike("%kw%"), Question.content.ilike("%kw%"))
+        ).order_by(Question.created_at.desc()).limit(10),
+        "questions.list subject": base.where(Question.subject_id == 12).order_by(Question.created_at.desc()).limit(10),
+        "questions.list review_status": base.where(Question.review_status == 0).order_by(Question.created_at.desc()).limit(10),
+        "questions.count": count,
+        "questions.list etag version": select(
+            func.count(Question.id),
+            func.max(Question.updated_at),
+            select(func.max(Subject.updated_at)).where(Subject.user_id == user_id).scalar_subquery(),
+        ).where(Question.user_id == user_id, Question.is_deleted.is_(False)),
+        "review.list pending": base.where(Question.review_status == 0).order_by(Question.created_at.desc()).limit(10),
+        "review.list due": base.where(Question.next_review_at <= now)
+        .order_by(Question.next_review_at.asc(), Question.id.asc()).limit(10),
+        "review.stats due": count.where(Question.next_review_at <= now),
+        "review.list important": base.where(Question.is_important.is_(True)).order_by(Question.created_at.desc()).limit(10),
+        "review.stats today": review_log.reviewed_questions_statement(user_id, today, today + timedelta(days=1)),
+        "review.stats streak days": review_log.active_days_statement(
+            user_id, today - timedelta(days=review_log.STREAK_WINDOW_DAYS - 1), today + timedelta(days=1)
+        ),
+        "dashboard.review_trend": review_log.daily_counts_statement(user_id, today - timedelta(days=6), today + timedelta(days=1)),
+        "dashboard.week mastered": review_log.reviewed_questions_statement(
+            user_id, today - timedelta(days=6), today + timedelta(days=1), "mastered"
+        ),
+        "review.events history": review_log.question_history_statement(1200, 50),
+        "dashboard.mastery": count.where(Question.mastery_status == "hard"),
+        "dashboard.subjects": select(Subject.id, func.count(Question.id))
+        .join(Question, Subject.id == Question.subject_id)
+        .where(Subject.user_id == user_id, Subject.is_deleted.is_(False), Question.user_id == user_id, Question.is_deleted.is_(False))
+        .group_by(Subject.id),
+        "exam.generate unreviewed": base.where(Question.difficulty == 2, Question.review_status == 0).limit(20),
+        "sampling candidate ids": sampling.ids_statement(
+            base.with_only_columns(Question.id).where(Question.review_status == 0, Question.difficulty == 2)
+        ),
+        "sampling version": sampling.version_statement(user_id),
+        "question_tags selectin": select(QuestionTag).where(QuestionTag.question_id.in_([1, 2, 3])),
+        "question_options selectin": select(QuestionOption).where(QuestionOption.question_id.in_([1, 2, 3])),
+        "questions.export batch": question_io.export_batch_statement(user_id, 1200, 500),
+        "questions.changes": changes.changes_statement(user_id, 100, 201),
+        "questions.changes initial": changes.changes_statement(user_id, 0, 201),
+        "duplicates candidates": duplicates.candidates_statement(user_id, duplicates.signature("二次函数的最值问题")),
+        "duplicates clusters": duplicates.clusters_statement(user_id),
+        "purge expired questions": purge.expired_questions_statement(now - timedelta(days=30), 200),
+        "ai.history": select(AIChatRecord).where(AIChatRecord.user_id == user_id).order_by(AIChatRecord.created_at.asc()).limit(50),
+    }
+
+
+def main() -> int:
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'explain.db'}")
+        db.metadata.create_all(engine)
+        with Session(engine) as session:
+            _seed(session)
+            for name, statement in _queries().items():
+                plan = explain_query_plan(session, statement)
+                scanned = [t for t in db.metadata.tables if is_full_scan(plan, t)]
+                status = "FULL SCAN" if scanned else "ok"
+                failures += bool(scanned)
+                print(f"[{status:>9}] {name}")
+                for step in plan:
+                    print(f"              {step}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
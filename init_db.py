@@ -1,12 +1,17 @@
-"""脚本方式初始化数据库（只在开发/部署时运行）。"""
+"""脚本方式初始化数据库（只在开发/部署时运行）。
 
-import os
+默认就地升级到最新结构并补充种子数据，已有数据不会丢失；
+加上 --reset 才会删除旧库重新创建。
+"""
+
+import argparse
 from pathlib import Path
 
 from werkzeug.security import generate_password_hash
 
 from app import create_app
 from app.config import Config
+from app.migrations import upgrade
 from app.models import db, User, Subject, Question, QuestionOption, QuestionTag
 
 
@@ -470,11 +475,13 @@ def seed_questions(user_id: int):
     db.session.commit()
 
 
-def init_database():
-    remove_existing_db()
+def init_database(reset: bool = False):
+    if reset:
+        remove_existing_db()
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
     app = create_app()
     with app.app_context():
-        db.create_all()
+        upgrade(db.engine)
         admin = create_admin_user()
         seed_subjects(admin.id)
         seed_questions(admin.id)
@@ -482,5 +489,7 @@ def init_database():
 
 
 if __name__ == "__main__":
-    init_database()
+    parser = argparse.ArgumentParser(description="初始化/升级数据库")
+    parser.add_argument("--reset", action="store_true", help="删除现有数据库后重新创建")
+    init_database(reset=parser.parse_args().reset)
 